@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# Purpose: synthetic `sacct -p` workload generator / stand-in sacct executable
+#   Emits realistic parsable sacct output without a slurmdbd: many users
+#   (skewed so a few dominate), several partitions, job steps (.batch,
+#   .extern, .0), array jobs, and COMPLETED/FAILED/CANCELLED/TIMEOUT/
+#   PREEMPTED mixes, with requeue chains visible under -D.
+#
+# As sacct: put a symlink named `sacct` on PATH so run() picks it up
+#   mkdir -p ~/fakebin && ln -s $PWD/fake_sacct.py ~/fakebin/sacct
+#   PATH=~/fakebin:$PATH FAKE_SACCT_JOBS=100000 ./sacct_reports.py
+#
+# As a generator: same flags as sacct plus --gen-*
+#   ./fake_sacct.py -a -p -S 2025-01-01 -E 2025-06-30 -o JobID,User,Partition,State \
+#       --gen-jobs 5000000 > dump.txt
+#
+# Scale and shape come from flags or environment:
+#   FAKE_SACCT_JOBS        top-level jobs in the -S..-E window (default 10000)
+#   FAKE_SACCT_USERS       distinct users (default 500)
+#   FAKE_SACCT_PARTITIONS  comma list; names containing "preempt" get
+#                          a high PREEMPTED rate (default below)
+#   FAKE_SACCT_SEED        RNG seed; same seed + args -> same output (default 0)
+#   FAKE_SACCT_CLUSTER     Cluster field when -M is not given (default engaging)
+#   FAKE_SACCT_CACHE       directory; identical calls replay a cached file
+#                          instead of regenerating (used by sacct_bench.py)
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sacct_reports import SACCT_TIME, parse_when
+
+DEFAULT_PARTITIONS = "mit_normal,mit_preemptable,mit_normal_gpu,sched_mit_hill,newnodes"
+DEFAULT_FIELDS = "JobID,User,Partition,State,Start,End,Elapsed"
+
+# (state, weight) for the final record of a top-level job
+STATES = [("COMPLETED", 70), ("FAILED", 10), ("CANCELLED", 7), ("TIMEOUT", 5),
+          ("OUT_OF_MEMORY", 2), ("PREEMPTED", 6)]
+PREEMPTABLE_STATES = [("COMPLETED", 45), ("FAILED", 8), ("CANCELLED", 5), ("TIMEOUT", 2),
+                      ("PREEMPTED", 40)]
+CPUS = [1, 1, 1, 2, 4, 4, 8, 16, 32, 64]
+# sacct --state abbreviations
+STATE_ALIASES = {"PD": "PENDING", "R": "RUNNING", "CD": "COMPLETED", "F": "FAILED",
+                 "CA": "CANCELLED", "TO": "TIMEOUT", "PR": "PREEMPTED", "OOM": "OUT_OF_MEMORY"}
+CHUNK_ROWS = 10000
+
+
+def fmt_elapsed(seconds: int) -> str:
+    days, rem = divmod(int(seconds), 86400)
+    h, rem = divmod(rem, 3600)
+    m, s = divmod(rem, 60)
+    if days:
+        return f"{days}-{h:02d}:{m:02d}:{s:02d}"
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    env = os.environ.get
+    p = argparse.ArgumentParser(description="Synthetic sacct output generator.")
+    # sacct flags that change what is printed
+    p.add_argument("-a", "--allusers", action="store_true")
+    p.add_argument("-n", "--noheader", action="store_true")
+    p.add_argument("-p", "--parsable", action="store_true")
+    p.add_argument("-P", "--parsable2", action="store_true")
+    p.add_argument("-X", "--allocations", action="store_true")
+    p.add_argument("-D", "--duplicates", action="store_true")
+    p.add_argument("-S", "--starttime")
+    p.add_argument("-E", "--endtime")
+    p.add_argument("-o", "--format", default=DEFAULT_FIELDS)
+    p.add_argument("-r", "--partition")
+    p.add_argument("-s", "--state")
+    p.add_argument("-u", "--user")
+    p.add_argument("-M", "--clusters")
+    # generator shape
+    p.add_argument("--gen-jobs", type=int, default=int(env("FAKE_SACCT_JOBS", "10000")))
+    p.add_argument("--gen-users", type=int, default=int(env("FAKE_SACCT_USERS", "500")))
+    p.add_argument("--gen-partitions", default=env("FAKE_SACCT_PARTITIONS", DEFAULT_PARTITIONS))
+    p.add_argument("--gen-seed", type=int, default=int(env("FAKE_SACCT_SEED", "0")))
+    p.add_argument("--gen-cache", default=env("FAKE_SACCT_CACHE"))
+    # anything else sacct accepts is ignored
+    args, _ = p.parse_known_args(argv)
+    return args
+
+
+def cluster_name(args: argparse.Namespace) -> str:
+    if args.clusters:
+        return args.clusters.split(",")[0]
+    return os.environ.get("FAKE_SACCT_CLUSTER", "engaging")
+
+
+def weighted(pairs: List[Tuple[str, int]]) -> Tuple[List[str], List[int]]:
+    values, cum, total = [], [], 0
+    for v, w in pairs:
+        total += w
+        values.append(v)
+        cum.append(total)
+    return values, cum
+
+
+def generate(args: argparse.Namespace, out) -> None:
+    now = datetime.now().replace(microsecond=0)
+    start = parse_when(args.starttime, now) or now - timedelta(days=30)
+    end = parse_when(args.endtime, now) or now
+    if end <= start:
+        end = start + timedelta(days=1)
+    span = (end - start).total_seconds()
+    cluster = cluster_name(args)
+
+    fields = [f.split("%")[0] for f in args.format.split(",") if f]
+    lower = [f.lower() for f in fields]
+    trailing = "|" if not args.parsable2 else ""
+    want_parts = set(args.partition.split(",")) if args.partition else None
+    want_states = None
+    if args.state:
+        want_states = tuple(STATE_ALIASES.get(s.upper(), s.upper()) for s in args.state.split(","))
+    want_users = set(args.user.split(",")) if args.user else None
+
+    # seed depends on the cluster so -M a and -M b differ
+    rng = random.Random(f"{args.gen_seed}:{cluster}")
+    users = [f"user{i:05d}" for i in range(args.gen_users)]
+    # Zipf-ish: a handful of users submit most of the jobs
+    user_cum = []
+    total = 0.0
+    for i in range(len(users)):
+        total += 1.0 / (i + 1) ** 1.1
+        user_cum.append(total)
+    partitions = [p for p in args.gen_partitions.split(",") if p]
+    part_cum = []
+    total = 0.0
+    for i in range(len(partitions)):
+        total += 1.0 / (i + 1)
+        part_cum.append(total)
+    states, state_cum = weighted(STATES)
+    pstates, pstate_cum = weighted(PREEMPTABLE_STATES)
+    end_ts = end.timestamp()
+    start_ts = start.timestamp()
+
+    def ts(t: float) -> str:
+        return datetime.fromtimestamp(t).strftime(SACCT_TIME)
+
+    if not args.noheader:
+        out.write("|".join(fields) + trailing + "\n")
+
+    buf: List[str] = []
+    jobid = 1000000 + rng.randrange(1000000)
+    array_base = None
+    array_left = 0
+    uid_for = {u: 100000 + i for i, u in enumerate(users)}
+
+    for _ in range(args.gen_jobs):
+        jobid += 1
+        if array_left:
+            array_left -= 1
+            jid = f"{array_base}_{array_left}"
+        elif rng.random() < 0.01:
+            array_base, array_left = jobid, rng.randrange(2, 50)
+            jid = f"{array_base}_{array_left}"
+        else:
+            jid = str(jobid)
+        user = rng.choices(users, cum_weights=user_cum)[0]
+        part = rng.choices(partitions, cum_weights=part_cum)[0]
+        preemptable = "preempt" in part
+        cpus = rng.choice(CPUS)
+        timelimit = rng.choice((3600, 3 * 3600, 12 * 3600, 86400, 2 * 86400))
+        submit = start_ts + rng.random() * span
+
+        # one record per attempt; preempted jobs are often requeued
+        attempts = []
+        t = submit
+        while True:
+            start_t = t + rng.expovariate(1 / 600.0)
+            run = min(rng.lognormvariate(7.5, 1.5), timelimit)
+            if preemptable:
+                state = rng.choices(pstates, cum_weights=pstate_cum)[0]
+            else:
+                state = rng.choices(states, cum_weights=state_cum)[0]
+            if state == "TIMEOUT":
+                run = timelimit
+            elif state == "PREEMPTED":
+                run *= rng.random()
+            attempts.append([state, start_t, start_t + run])
+            if state != "PREEMPTED" or len(attempts) > 3 or rng.random() < 0.4:
+                break
+            t = start_t + run
+        if not args.duplicates:
+            attempts = attempts[-1:]
+
+        for state, start_t, end_t in attempts:
+            if start_t > end_ts:
+                state, s_start, s_end, elapsed = "PENDING", "Unknown", "Unknown", 0
+            elif end_t > end_ts:
+                state, s_start, s_end, elapsed = "RUNNING", ts(start_t), "Unknown", end_ts - start_t
+            else:
+                s_start, s_end, elapsed = ts(start_t), ts(end_t), end_t - start_t
+            if state == "CANCELLED":
+                state = f"CANCELLED by {uid_for[user]}"
+
+            if want_parts is not None and part not in want_parts:
+                continue
+            if want_users is not None and user not in want_users:
+                continue
+            if want_states is not None and not state.startswith(want_states):
+                continue
+
+            rec = {
+                "jobid": jid, "jobidraw": str(jobid), "user": user, "partition": part,
+                "state": state, "submit": ts(submit), "start": s_start, "end": s_end,
+                "elapsed": fmt_elapsed(elapsed), "elapsedraw": str(int(elapsed)),
+                "alloccpus": str(cpus if s_start != "Unknown" else 0), "ncpus": str(cpus),
+                "timelimit": fmt_elapsed(timelimit), "timelimitraw": str(timelimit // 60), "cluster": cluster,
+                "account": "mit_general", "exitcode": "0:0" if state == "COMPLETED" else "1:0",
+                "nodelist": f"node{rng.randrange(1000, 5000)}" if s_start != "Unknown" else "None assigned",
+                "jobname": "jupyter" if rng.random() < 0.1 else "job",
+            }
+            buf.append("|".join([rec.get(f, "") for f in lower]) + trailing)
+
+            if not args.allocations and s_start != "Unknown":
+                # steps have no User or Partition in sacct output
+                step_end = s_end
+                step_state = state if not state.startswith("CANCELLED") else "CANCELLED"
+                steps = [("batch", step_state), ("extern", "COMPLETED" if s_end != "Unknown" else "RUNNING")]
+                if rng.random() < 0.3:
+                    steps.append(("0", step_state))
+                for step, sstate in steps:
+                    rec["jobid"] = f"{jid}.{step}"
+                    rec["jobidraw"] = f"{jobid}.{step}"
+                    rec["user"] = rec["partition"] = ""
+                    rec["state"] = sstate
+                    rec["end"] = step_end
+                    buf.append("|".join([rec.get(f, "") for f in lower]) + trailing)
+
+        if len(buf) >= CHUNK_ROWS:
+            buf.append("")
+            out.write("\n".join(buf))
+            buf = []
+    if buf:
+        buf.append("")
+        out.write("\n".join(buf))
+
+
+def cache_path(args: argparse.Namespace) -> str:
+    # -S/-E relative to "now" would otherwise never hit the cache
+    key = repr(sorted((k, v) for k, v in vars(args).items() if k != "gen_cache"))
+    return os.path.join(args.gen_cache, hashlib.sha1(key.encode()).hexdigest() + ".txt")
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    try:
+        if args.gen_cache:
+            path = cache_path(args)
+            if not os.path.exists(path):
+                os.makedirs(args.gen_cache, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    generate(args, f)
+                os.replace(tmp, path)
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, sys.stdout.buffer, 1 << 20)
+        else:
+            generate(args, sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # reader stopped early (head, a generator closed mid-stream)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# Purpose: read node load from Ganglia without a browser -- the programmatic
+#   side of ganglia-access. gmetad dumps the whole grid as XML to anyone who
+#   connects to its XML port; that stream is opened through a paramiko
+#   direct-tcpip channel (the same hop ganglia-access makes with ssh -L)
+#   and parsed with iterparse as it arrives. Each HOST is reduced to a row
+#   of numbers and its element cleared, so memory stays flat however big
+#   the cluster XML is. The result is a Snapshot: host names plus one numpy
+#   array per metric (load, CPUs, memory, network), which answers "least
+#   loaded nodes in partition X" (partition membership from sinfo).
+#
+#   --direct HOST:PORT or --file FILE read from a plain socket or a saved
+#   dump instead, e.g. a local stand-in server.
+#
+# Usage: ./ganglia_client.py -u USER [--partition P] [--top N] [--json]
+#        ./ganglia_client.py --direct localhost:8651 [--partition P] ...
+# Example: ./ganglia_client.py -u jdoe --partition mit_normal --top 10
+import argparse
+import json
+import math
+import socket
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from queue_wait import Execute, local_execute
+
+SSH_HOST = "eofe10.mit.edu"
+GMETAD = ("10.1.2.104", 8651)
+METRICS = ("load_one", "load_five", "load_fifteen", "cpu_num", "cpu_idle",
+           "mem_total", "mem_free", "mem_cached", "mem_buffers", "bytes_in", "bytes_out")
+# a host that has not reported for this many seconds is treated as down
+STALE_SECONDS = 300
+
+
+def short(host: str) -> str:
+    """node1234.mit.edu -> node1234; IP addresses are kept whole."""
+    return host if host.replace(".", "").isdigit() else host.split(".")[0]
+
+
+class Snapshot:
+    """One metrics dump as columns: hosts[i] has metrics[name][i]."""
+
+    def __init__(self, hosts: List[str], clusters: List[str], tn: np.ndarray,
+                 metrics: Dict[str, np.ndarray], taken: float):
+        self.hosts = hosts
+        self.clusters = clusters
+        self.tn = tn              # seconds since each host last reported
+        self.metrics = metrics
+        self.taken = taken
+        self.position = {short(h): i for i, h in enumerate(hosts)}
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def load_per_cpu(self) -> np.ndarray:
+        cpus = self.metrics["cpu_num"]
+        return self.metrics["load_one"] / np.where(cpus > 0, cpus, np.nan)
+
+    def mem_free_fraction(self) -> np.ndarray:
+        m = self.metrics
+        free = m["mem_free"] + np.nan_to_num(m["mem_cached"]) + np.nan_to_num(m["mem_buffers"])
+        return free / np.where(m["mem_total"] > 0, m["mem_total"], np.nan)
+
+    def select(self, nodes: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Indices of the given nodes (short names) that are up and reporting load."""
+        if nodes is None:
+            idx = np.arange(len(self.hosts))
+        else:
+            idx = np.array(sorted(self.position[n] for n in {short(n) for n in nodes} if n in self.position),
+                           dtype=np.int64)
+        if not len(idx):
+            return idx
+        ok = (self.tn[idx] < STALE_SECONDS) & ~np.isnan(self.load_per_cpu()[idx])
+        return idx[ok]
+
+    def least_loaded(self, nodes: Optional[Iterable[str]] = None, n: int = 10) -> List[dict]:
+        """The n up nodes with the lowest load per CPU (then most free memory)."""
+        idx = self.select(nodes)
+        load = self.load_per_cpu()[idx]
+        free = np.nan_to_num(self.mem_free_fraction()[idx])
+        order = idx[np.lexsort((-free, load))][:n]
+        return [self.row(i) for i in order]
+
+    def row(self, i: int) -> dict:
+        m = self.metrics
+
+        def num(v: float) -> Optional[float]:
+            return None if math.isnan(v) else round(float(v), 3)
+
+        return {
+            "host": short(self.hosts[i]),
+            "cluster": self.clusters[i],
+            "load_one": num(m["load_one"][i]),
+            "cpus": num(m["cpu_num"][i]),
+            "load_per_cpu": num(self.load_per_cpu()[i]),
+            "mem_free_fraction": num(self.mem_free_fraction()[i]),
+            "bytes_in": num(m["bytes_in"][i]),
+            "bytes_out": num(m["bytes_out"][i]),
+            "reported_ago": int(self.tn[i]),
+        }
+
+
+def parse(stream: BinaryIO) -> Snapshot:
+    """Stream gmetad/gmond XML into a Snapshot, clearing each HOST once read."""
+    hosts: List[str] = []
+    clusters: List[str] = []
+    tn = array("q")
+    cols = {name: array("f") for name in METRICS}
+    values: Dict[str, float] = {}
+    cluster_name = ""
+    parent = None             # the open CLUSTER
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == "CLUSTER":
+                cluster_name = elem.get("NAME", "")
+                parent = elem
+            elif tag == "HOST":
+                values = dict.fromkeys(METRICS, math.nan)
+            continue
+        if tag == "METRIC":
+            name = elem.get("NAME")
+            if name in values:
+                try:
+                    values[name] = float(elem.get("VAL", "nan"))
+                except ValueError:
+                    pass
+            elem.clear()
+        elif tag == "HOST":
+            hosts.append(elem.get("NAME", ""))
+            clusters.append(cluster_name)
+            tn.append(int(elem.get("TN", "0") or 0))
+            for name in METRICS:
+                cols[name].append(values[name])
+            elem.clear()
+            if parent is not None:
+                # drop the finished HOST from its CLUSTER too
+                parent.clear()
+        elif tag == "CLUSTER":
+            elem.clear()
+            parent = None
+    metrics = {name: np.frombuffer(col, dtype=np.float32).astype(np.float64) for name, col in cols.items()}
+    return Snapshot(hosts, clusters, np.frombuffer(tn, dtype=np.int64).copy(), metrics, time.time())
+
+
+def ssh_client(username: str, hostname: str = SSH_HOST, key_filename: Optional[str] = None,
+               password: Optional[str] = None):
+    import paramiko
+
+    ssh = paramiko.SSHClient()
+    ssh.load_system_host_keys()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        ssh.connect(hostname=hostname, username=username, key_filename=key_filename, password=password)
+    except paramiko.SSHException as e:
+        raise OSError(f"ssh to {hostname}: {e}") from e
+    return ssh
+
+
+def ssh_snapshot(ssh, target=GMETAD, timeout: float = 60, connect_timeout: Optional[float] = None) -> Snapshot:
+    """Parse the XML from target, reached through the SSH session (ssh -L without a local port).
+
+    connect_timeout bounds opening the tunnel (default timeout), timeout each read.
+    """
+    import paramiko
+
+    try:
+        channel = ssh.get_transport().open_channel("direct-tcpip", target, ("127.0.0.1", 0),
+                                                   timeout=connect_timeout or timeout)
+    except paramiko.SSHException as e:
+        raise OSError(f"tunnel to {target[0]}:{target[1]}: {e}") from e
+    channel.settimeout(timeout)
+    try:
+        with channel.makefile("rb") as stream:
+            return parse(stream)
+    finally:
+        channel.close()
+
+
+def direct_snapshot(host: str, port: int, timeout: float = 60, connect_timeout: Optional[float] = None) -> Snapshot:
+    with socket.create_connection((host, port), timeout=connect_timeout or timeout) as sock:
+        sock.settimeout(timeout)
+        with sock.makefile("rb") as stream:
+            return parse(stream)
+
+
+def file_snapshot(path: str) -> Snapshot:
+    with open(path, "rb") as stream:
+        return parse(stream)
+
+
+def ssh_execute(ssh) -> Execute:
+    def execute(cmd: str):
+        _, stdout, stderr = ssh.exec_command(cmd)
+        return stdout.read().decode(), stderr.read().decode()
+    return execute
+
+
+def partition_nodes(execute: Execute, partition: str) -> Set[str]:
+    out, _ = execute(f"sinfo -h -N -p {partition} -o %N")
+    return {line.strip() for line in out.splitlines() if line.strip()}
+
+
+def print_rows(rows: List[dict]) -> None:
+    print(f"{'node':<20} {'load1':>7} {'cpus':>5} {'load/cpu':>9} {'mem free':>9} "
+          f"{'net in':>10} {'net out':>10}")
+    for r in rows:
+        def fmt(v, spec):
+            return format(v, spec) if v is not None else "-"
+        print(f"{r['host']:<20} {fmt(r['load_one'], '>7.2f')} {fmt(r['cpus'], '>5.0f')} "
+              f"{fmt(r['load_per_cpu'], '>9.2f')} "
+              f"{fmt(r['mem_free_fraction'] * 100 if r['mem_free_fraction'] is not None else None, '>8.0f')}% "
+              f"{fmt(r['bytes_in'], '>10.0f')} {fmt(r['bytes_out'], '>10.0f')}")
+
+
+def parse_target(value: str):
+    host, _, port = value.rpartition(":")
+    return host, int(port)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Per-node load from Ganglia, without the web UI.")
+    src = p.add_mutually_exclusive_group()
+    src.add_argument("-u", "--username", help=f"ssh to {SSH_HOST} as this user and tunnel to gmetad")
+    src.add_argument("--direct", metavar="HOST:PORT", help="read the XML straight from this address")
+    src.add_argument("--file", help="read a saved XML dump")
+    p.add_argument("--ssh-host", default=SSH_HOST, help=f"ssh gateway (default {SSH_HOST})")
+    p.add_argument("-i", "--identity", help="ssh private key")
+    p.add_argument("--target", default=f"{GMETAD[0]}:{GMETAD[1]}",
+                   help=f"gmetad XML port as seen from the gateway (default {GMETAD[0]}:{GMETAD[1]})")
+    p.add_argument("-p", "--partition", help="only nodes in this partition (sinfo)")
+    p.add_argument("-n", "--top", type=int, default=10, help="nodes to list (default 10)")
+    p.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = p.parse_args(argv)
+    if not (args.username or args.direct or args.file):
+        p.error("one of --username, --direct or --file is required")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    ssh = None
+    t0 = time.monotonic()
+    try:
+        if args.username:
+            ssh = ssh_client(args.username, args.ssh_host, args.identity)
+            snapshot = ssh_snapshot(ssh, parse_target(args.target))
+            execute = ssh_execute(ssh)
+        elif args.direct:
+            snapshot = direct_snapshot(*parse_target(args.direct))
+            execute = local_execute
+        else:
+            snapshot = file_snapshot(args.file)
+            execute = local_execute
+        nodes = partition_nodes(execute, args.partition) if args.partition else None
+    except (OSError, ET.ParseError, ValueError) as e:
+        sys.stderr.write(f"Error: cannot read Ganglia metrics: {e}\n")
+        sys.exit(1)
+    finally:
+        if ssh is not None:
+            ssh.close()
+    if nodes is not None and not nodes:
+        sys.stderr.write(f"Error: sinfo lists no nodes in partition {args.partition}.\n")
+        sys.exit(1)
+
+    rows = snapshot.least_loaded(nodes, args.top)
+    if args.json:
+        print(json.dumps({"hosts": len(snapshot), "seconds": round(time.monotonic() - t0, 3), "nodes": rows},
+                         indent=2))
+    else:
+        print(f"# {len(snapshot)} hosts in {time.monotonic() - t0:.2f}s"
+              + (f", partition {args.partition}" if args.partition else ""))
+        print_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+# Purpose: keep Ganglia history locally, so post-mortems do not mean pulling
+#   graphs through the tunnel. `record` takes a ganglia_client.py snapshot
+#   (once, or every --every seconds) and appends one fixed-width record per
+#   reporting host -- time, host id, sample count, every METRIC as float32
+#   -- to append-only segment files, one file per period and resolution:
+#     raw   every snapshot     1-day segments,  kept 2 days
+#     5m    5-minute means     7-day segments,  kept 35 days
+#     1h    hourly means       90-day segments, kept 2 years
+#   After each snapshot, buckets that are complete are averaged from the
+#   next finer level (load_max keeps the peak) and appended, then segments
+#   past their retention are deleted -- only once they have been rolled up.
+#   Records in a segment are in time order, so a range query is a binary
+#   search on a memory-mapped file plus a numpy mask over the hosts.
+#
+#   `job` joins this with sacct: the job's nodes and Start..End (plus a
+#   margin on both sides) -> what each node was doing meanwhile.
+#
+# Usage: ./ganglia_store.py record (-u USER | --direct HOST:PORT | --file FILE) [--every SECONDS]
+#        ./ganglia_store.py query NODE [NODE ...] -S START [-E END] [--resolution raw|5m|1h] [--json]
+#        ./ganglia_store.py job JOBID [--margin MINUTES] [--series] [--json]
+#        ./ganglia_store.py info
+# Example: ./ganglia_store.py record -u jdoe --every 60 >> ~/ganglia_store.log 2>&1 &
+#          ./ganglia_store.py job 4812345 --series
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ganglia_client import (
+    GMETAD, METRICS, SSH_HOST, Snapshot, direct_snapshot, file_snapshot, parse_target, short, ssh_client,
+    ssh_snapshot,
+)
+from sacct_reports import parse_time, parse_when
+from slurm_hosts import expand_hosts, run
+
+STORE = os.environ.get("GANGLIA_STORE", os.path.expanduser("~/.cache/ganglia_store"))
+DAY = 86400
+# (name, bucket seconds (0: every snapshot), segment seconds, retention seconds), finest first
+LEVELS = [
+    ("raw", 0, DAY, 2 * DAY),
+    ("5m", 300, 7 * DAY, 35 * DAY),
+    ("1h", 3600, 90 * DAY, 730 * DAY),
+]
+# one 64-byte record per host and sample; n is how many snapshots it averages
+RECORD = np.dtype([("t", "<i8"), ("host", "<u4"), ("n", "<u4"), ("load_max", "<f4")]
+                  + [(m, "<f4") for m in METRICS])
+JOB_FIELDS = ["JobID", "User", "Partition", "State", "Start", "End", "NodeList", "AllocCPUS"]
+MARGIN = 15              # minutes shown before and after a job
+
+
+def log(msg: str) -> None:
+    print(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {msg}", flush=True)
+
+
+def local_time(t: float) -> str:
+    """Epoch seconds in sacct's (local) format."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t))
+
+
+def aggregate(rows: np.ndarray, step: int) -> np.ndarray:
+    """One record per (step-aligned bucket, host): n-weighted means, NaN-aware, and the peak load."""
+    bucket = rows["t"] // step * step
+    order = np.lexsort((rows["host"], bucket))
+    bucket, host = bucket[order], rows["host"][order]
+    starts = np.flatnonzero(np.r_[True, (bucket[1:] != bucket[:-1]) | (host[1:] != host[:-1])])
+    out = np.zeros(len(starts), RECORD)
+    out["t"] = bucket[starts]
+    out["host"] = host[starts]
+    n = rows["n"][order].astype(np.float64)
+    out["n"] = np.add.reduceat(n, starts)
+    out["load_max"] = np.fmax.reduceat(rows["load_max"][order], starts)
+    for m in METRICS:
+        v = rows[m][order].astype(np.float64)
+        ok = ~np.isnan(v)
+        total = np.add.reduceat(np.where(ok, v * n, 0.0), starts)
+        weight = np.add.reduceat(np.where(ok, n, 0.0), starts)
+        out[m] = np.divide(total, weight, out=np.full(len(starts), np.nan), where=weight > 0)
+    return out
+
+
+def derived(rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-record load per CPU (mean and peak) and free memory fraction, as ganglia_client.Snapshot."""
+    cpus = rows["cpu_num"].astype(np.float64)
+    cpus = np.where(cpus > 0, cpus, np.nan)
+    total = rows["mem_total"].astype(np.float64)
+    free = (rows["mem_free"] + np.nan_to_num(rows["mem_cached"]) + np.nan_to_num(rows["mem_buffers"]))
+    return {
+        "load_per_cpu": rows["load_one"] / cpus,
+        "peak_load_per_cpu": rows["load_max"] / cpus,
+        "mem_free_fraction": free / np.where(total > 0, total, np.nan),
+    }
+
+
+class GangliaStore:
+    """Append-only, multi-resolution segment files of host metrics under path."""
+
+    def __init__(self, path: str = STORE):
+        self.path = path
+        self.hosts: List[str] = []
+        try:
+            with open(os.path.join(path, "hosts.json")) as f:
+                self.hosts = json.load(f)
+        except (OSError, ValueError):
+            pass
+        self.ids = {h: i for i, h in enumerate(self.hosts)}
+
+    def host_ids(self, names: List[str]) -> np.ndarray:
+        """Ids of names, assigning (and saving) ids for hosts not seen before."""
+        new = [n for n in dict.fromkeys(names) if n not in self.ids]
+        if new:
+            for n in new:
+                self.ids[n] = len(self.hosts)
+                self.hosts.append(n)
+            # saved before any record uses the new ids
+            os.makedirs(self.path, exist_ok=True)
+            tmp = os.path.join(self.path, f"hosts.json.{os.getpid()}")
+            with open(tmp, "w") as f:
+                json.dump(self.hosts, f)
+            os.replace(tmp, os.path.join(self.path, "hosts.json"))
+        return np.array([self.ids[n] for n in names], dtype=np.uint32)
+
+    def segments(self, level: str) -> List[Tuple[int, str]]:
+        """(period start, path) of the level's segment files, oldest first."""
+        directory = os.path.join(self.path, level)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted((int(n[:-4]), os.path.join(directory, n)) for n in names
+                      if n.endswith(".seg") and n[:-4].isdigit())
+
+    @staticmethod
+    def load(path: str) -> np.ndarray:
+        """The segment's whole records, memory-mapped (a torn last record is ignored)."""
+        count = os.path.getsize(path) // RECORD.itemsize
+        if not count:
+            return np.zeros(0, RECORD)
+        return np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+
+    def last_time(self, level: str) -> Optional[int]:
+        for _, path in reversed(self.segments(level)):
+            rows = self.load(path)
+            if len(rows):
+                return int(rows["t"][-1])
+        return None
+
+    def first_time(self, level: str) -> Optional[int]:
+        for _, path in self.segments(level):
+            rows = self.load(path)
+            if len(rows):
+                return int(rows["t"][0])
+        return None
+
+    def append(self, level: str, rows: np.ndarray) -> int:
+        """Append time-ordered rows to their segments; rows not newer than a segment's end are dropped."""
+        _, _, span, _ = next(lv for lv in LEVELS if lv[0] == level)
+        directory = os.path.join(self.path, level)
+        os.makedirs(directory, exist_ok=True)
+        period = rows["t"] // span * span
+        written = 0
+        for start in np.unique(period):
+            part = rows[period == start]
+            path = os.path.join(directory, f"{start}.seg")
+            with open(path, "ab") as f:
+                size = f.tell()
+                if size % RECORD.itemsize:
+                    # a write cut short by a crash: drop the partial record
+                    size -= size % RECORD.itemsize
+                    f.truncate(size)
+                if size:
+                    last = int(self.load(path)["t"][-1])
+                    part = part[part["t"] > last]
+                f.write(part.tobytes())
+            written += len(part)
+        return written
+
+    def record(self, snapshot: Snapshot) -> int:
+        """Append the hosts that are up in snapshot at its time, then roll up and expire."""
+        idx = snapshot.select()
+        t = int(snapshot.taken)
+        names = [short(snapshot.hosts[i]) for i in idx]
+        rows = np.zeros(len(idx), RECORD)
+        rows["t"] = t
+        rows["host"] = self.host_ids(names)
+        rows["n"] = 1
+        for m in METRICS:
+            rows[m] = snapshot.metrics[m][idx]
+        rows["load_max"] = rows["load_one"]
+        written = self.append("raw", rows[np.argsort(rows["host"], kind="stable")])
+        self.roll_up(t)
+        self.expire(t)
+        return written
+
+    def roll_up(self, now: int) -> int:
+        """Average every complete bucket that the coarser levels do not have yet; returns records added."""
+        added = 0
+        # everything finer than this time is final: raw samples only arrive later
+        complete = now
+        for (finer, _, _, _), (level, step, _, _) in zip(LEVELS, LEVELS[1:]):
+            last = self.last_time(level)
+            first = self.first_time(finer) if last is None else last + step
+            until = complete // step * step
+            if first is not None:
+                first = first // step * step
+                if first < until:
+                    rows = self.read(finer, first, until)
+                    if len(rows):
+                        added += self.append(level, aggregate(rows, step))
+            complete = until
+        return added
+
+    def expire(self, now: int) -> int:
+        """Delete segments past retention whose data the next coarser level already holds."""
+        removed = 0
+        for i, (level, _, span, keep) in enumerate(LEVELS):
+            if i + 1 < len(LEVELS):
+                coarser, step = LEVELS[i + 1][0], LEVELS[i + 1][1]
+                last = self.last_time(coarser)
+                rolled = -1 if last is None else last + step
+            else:
+                rolled = now
+            for start, path in self.segments(level):
+                if start + span <= min(now - keep, rolled):
+                    os.unlink(path)
+                    removed += 1
+        return removed
+
+    def read(self, level: str, t0: int, t1: int, hosts: Optional[np.ndarray] = None) -> np.ndarray:
+        """Records with t0 <= t < t1 (of the given host ids), in time order."""
+        span = next(lv for lv in LEVELS if lv[0] == level)[2]
+        parts = []
+        for start, path in self.segments(level):
+            if start + span <= t0 or start >= t1:
+                continue
+            rows = self.load(path)
+            t = rows["t"]
+            lo, hi = np.searchsorted(t, t0, "left"), np.searchsorted(t, t1, "left")
+            part = np.array(rows[lo:hi])
+            if hosts is not None:
+                part = part[np.isin(part["host"], hosts)]
+            parts.append(part)
+        return np.concatenate(parts) if parts else np.zeros(0, RECORD)
+
+    def level_for(self, t0: int) -> str:
+        """The finest level holding data from t0, else the one reaching furthest back."""
+        firsts = [(level, self.first_time(level)) for level, _, _, _ in LEVELS]
+        firsts = [(level, first) for level, first in firsts if first is not None]
+        for level, first in firsts:
+            if first <= t0:
+                return level
+        return min(firsts, key=lambda lf: lf[1])[0] if firsts else LEVELS[0][0]
+
+    def query(self, nodes: List[str], t0: int, t1: int,
+              level: Optional[str] = None) -> Tuple[str, List[str], np.ndarray]:
+        """(level used, host names, records) for the nodes over [t0, t1)."""
+        level = level or self.level_for(t0)
+        step = next(lv for lv in LEVELS if lv[0] == level)[1]
+        if step:
+            # include the bucket that t0 falls in
+            t0 = t0 // step * step
+        ids = np.array([self.ids[short(n)] for n in nodes if short(n) in self.ids], dtype=np.uint32)
+        return level, self.hosts, self.read(level, t0, t1, ids) if len(ids) else np.zeros(0, RECORD)
+
+
+def series(hosts: List[str], rows: np.ndarray) -> List[dict]:
+    """One dict per record, for printing."""
+    d = derived(rows)
+
+    def num(v) -> Optional[float]:
+        return None if np.isnan(v) else round(float(v), 3)
+
+    return [{
+        "time": local_time(int(rows["t"][i])),
+        "host": hosts[int(rows["host"][i])],
+        "samples": int(rows["n"][i]),
+        "load_per_cpu": num(d["load_per_cpu"][i]),
+        "peak_load_per_cpu": num(d["peak_load_per_cpu"][i]),
+        "mem_free_fraction": num(d["mem_free_fraction"][i]),
+        "bytes_in": num(rows["bytes_in"][i]),
+        "bytes_out": num(rows["bytes_out"][i]),
+    } for i in range(len(rows))]
+
+
+def summarize(hosts: List[str], rows: np.ndarray, t0: int, t1: int, step: int = 0) -> List[dict]:
+    """Per host over [t0, t1): mean and peak load per CPU, lowest free memory, mean network.
+
+    With step, records are buckets [t, t + step) and count if they overlap [t0, t1).
+    """
+    rows = rows[(rows["t"] + step > t0) & (rows["t"] < t1)] if step else rows[(rows["t"] >= t0) & (rows["t"] < t1)]
+    d = derived(rows)
+    out = []
+    for host in np.unique(rows["host"]):
+        sel = rows["host"] == host
+        w = rows["n"][sel].astype(np.float64)
+
+        def mean(v: np.ndarray) -> Optional[float]:
+            ok = ~np.isnan(v)
+            return round(float(np.average(v[ok], weights=w[ok])), 3) if ok.any() else None
+
+        def extreme(fn, v: np.ndarray) -> Optional[float]:
+            return None if np.isnan(v).all() else round(float(fn(v)), 3)
+
+        out.append({
+            "host": hosts[int(host)],
+            "samples": int(w.sum()),
+            "mean_load_per_cpu": mean(d["load_per_cpu"][sel]),
+            "peak_load_per_cpu": extreme(np.nanmax, d["peak_load_per_cpu"][sel]),
+            "min_mem_free_fraction": extreme(np.nanmin, d["mem_free_fraction"][sel]),
+            "mean_bytes_in": mean(rows["bytes_in"][sel].astype(np.float64)),
+            "mean_bytes_out": mean(rows["bytes_out"][sel].astype(np.float64)),
+        })
+    return out
+
+
+def sacct_job(jobid: str) -> List[Dict[str, str]]:
+    """sacct allocation rows for the job (one per array task / het component)."""
+    out = run(["sacct", "-n", "-p", "-X", "-j", jobid, "-o", ",".join(JOB_FIELDS)])
+    rows = []
+    for line in out.splitlines():
+        values = line.split("|")
+        if len(values) >= len(JOB_FIELDS):
+            rows.append(dict(zip(JOB_FIELDS, (v.strip() for v in values))))
+    return rows
+
+
+def job_report(store: GangliaStore, job: Dict[str, str], margin: int, level: Optional[str] = None) -> dict:
+    """What the job's nodes were doing before, during and after it."""
+    report = {"job": job}
+    start = parse_time(job["Start"])
+    if start is None or job["NodeList"] in ("", "None assigned"):
+        report["error"] = "job has not started"
+        return report
+    end = parse_time(job["End"])
+    t_start = int(start.timestamp())
+    t_end = int(end.timestamp()) if end else int(time.time())
+    nodes = expand_hosts([job["NodeList"]])
+    used, hosts, rows = store.query(nodes, t_start - margin, t_end + margin, level)
+    step = next(lv for lv in LEVELS if lv[0] == used)[1]
+    report.update({
+        "nodes": nodes,
+        "resolution": used,
+        "before": summarize(hosts, rows, t_start - margin, t_start, step),
+        "during": summarize(hosts, rows, t_start, t_end, step),
+        "after": summarize(hosts, rows, t_end, t_end + margin, step),
+        "series": series(hosts, rows),
+    })
+    if not len(rows):
+        report["error"] = f"no samples for these nodes at {used} resolution"
+    return report
+
+
+def print_series(rows: List[dict]) -> None:
+    print(f"{'time':<19} {'node':<16} {'n':>4} {'load/cpu':>9} {'peak':>6} {'mem free':>9} "
+          f"{'net in':>10} {'net out':>10}")
+    for r in rows:
+        def fmt(v, spec):
+            return format(v, spec) if v is not None else "-"
+        print(f"{r['time']:<19} {r['host']:<16} {r['samples']:>4} {fmt(r['load_per_cpu'], '>9.2f')} "
+              f"{fmt(r['peak_load_per_cpu'], '>6.2f')} "
+              f"{fmt(r['mem_free_fraction'] * 100 if r['mem_free_fraction'] is not None else None, '>8.0f')}% "
+              f"{fmt(r['bytes_in'], '>10.0f')} {fmt(r['bytes_out'], '>10.0f')}")
+
+
+def print_summary(title: str, rows: List[dict]) -> None:
+    print(f"  {title}:")
+    if not rows:
+        print("    (no samples)")
+    for r in rows:
+        def fmt(v, spec):
+            return format(v, spec) if v is not None else "-"
+        mem = r["min_mem_free_fraction"]
+        print(f"    {r['host']:<16} load/cpu mean {fmt(r['mean_load_per_cpu'], '.2f')} "
+              f"peak {fmt(r['peak_load_per_cpu'], '.2f')}, "
+              f"min mem free {fmt(mem * 100 if mem is not None else None, '.0f')}%, "
+              f"net in/out {fmt(r['mean_bytes_in'], '.0f')}/{fmt(r['mean_bytes_out'], '.0f')} B/s "
+              f"({r['samples']} samples)")
+
+
+def snapshot_source(args: argparse.Namespace) -> Callable[[], Snapshot]:
+    """A function returning a fresh snapshot; the ssh session is reopened after a failure."""
+    if args.direct:
+        return lambda: direct_snapshot(*parse_target(args.direct))
+    if args.file:
+        return lambda: file_snapshot(args.file)
+    session = {}
+
+    def take() -> Snapshot:
+        if "ssh" not in session:
+            session["ssh"] = ssh_client(args.username, args.ssh_host, args.identity)
+        try:
+            return ssh_snapshot(session["ssh"], parse_target(args.target))
+        except OSError:
+            session.pop("ssh").close()
+            raise
+    return take
+
+
+def record_loop(store: GangliaStore, take: Callable[[], Snapshot], every: float) -> None:
+    lock = open(os.path.join(store.path, ".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        sys.stderr.write(f"Error: another recorder is writing to {store.path}.\n")
+        sys.exit(1)
+    while True:
+        t0 = time.monotonic()
+        try:
+            snapshot = take()
+            written = store.record(snapshot)
+            log(f"recorded {written} hosts in {time.monotonic() - t0:.1f}s")
+        except (OSError, ET.ParseError, ValueError) as e:
+            log(f"error: cannot read Ganglia metrics: {e}")
+            if not every:
+                sys.exit(1)
+        if not every:
+            return
+        time.sleep(max(every - (time.monotonic() - t0), 0))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--store", default=STORE, help=f"store directory (default $GANGLIA_STORE or {STORE})")
+    levels = [lv[0] for lv in LEVELS]
+
+    p = argparse.ArgumentParser(description="Local multi-resolution history of Ganglia host metrics.")
+    sub = p.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("record", parents=[common], help="append snapshots to the store")
+    src = r.add_mutually_exclusive_group(required=True)
+    src.add_argument("-u", "--username", help=f"ssh to {SSH_HOST} as this user and tunnel to gmetad")
+    src.add_argument("--direct", metavar="HOST:PORT", help="read the XML straight from this address")
+    src.add_argument("--file", help="read a saved XML dump")
+    r.add_argument("--ssh-host", default=SSH_HOST, help=f"ssh gateway (default {SSH_HOST})")
+    r.add_argument("-i", "--identity", help="ssh private key")
+    r.add_argument("--target", default=f"{GMETAD[0]}:{GMETAD[1]}",
+                   help=f"gmetad XML port as seen from the gateway (default {GMETAD[0]}:{GMETAD[1]})")
+    r.add_argument("--every", type=float, default=0,
+                   help="keep recording every this many seconds (default: once)")
+
+    q = sub.add_parser("query", parents=[common], help="metrics of nodes over a time range")
+    q.add_argument("nodes", nargs="+", help="node names or Slurm ranges (node[1-4])")
+    q.add_argument("-S", "--start", required=True, help="YYYY-MM-DD[THH:MM[:SS]] or now-N{days,hours,minutes}")
+    q.add_argument("-E", "--end", default="now")
+    q.add_argument("--resolution", choices=levels, help="level to read (default: finest that covers -S)")
+    q.add_argument("--json", action="store_true", help="print records as JSON")
+
+    j = sub.add_parser("job", parents=[common], help="what a job's nodes were doing while it ran")
+    j.add_argument("jobid")
+    j.add_argument("--margin", type=int, default=MARGIN,
+                   help=f"minutes before and after the job to include (default {MARGIN})")
+    j.add_argument("--resolution", choices=levels, help="level to read (default: finest that covers the job)")
+    j.add_argument("--series", action="store_true", help="also print every sample")
+    j.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    sub.add_parser("info", parents=[common], help="segments, size and time span per level")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    store = GangliaStore(args.store)
+
+    if args.command == "record":
+        os.makedirs(args.store, exist_ok=True)
+        try:
+            record_loop(store, snapshot_source(args), args.every)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.command == "info":
+        levels = []
+        for level, step, _, keep in LEVELS:
+            segs = store.segments(level)
+            first, last = store.first_time(level), store.last_time(level)
+            levels.append({
+                "level": level, "bucket_seconds": step, "keep_days": keep / DAY, "segments": len(segs),
+                "bytes": sum(os.path.getsize(p) for _, p in segs),
+                "first": local_time(first) if first is not None else None,
+                "last": local_time(last) if last is not None else None,
+            })
+        print(json.dumps({"store": args.store, "hosts": len(store.hosts), "levels": levels}, indent=2))
+        return
+
+    if args.command == "query":
+        start, end = parse_when(args.start), parse_when(args.end)
+        if start is None or end is None:
+            sys.stderr.write("Error: cannot parse -S/-E; use YYYY-MM-DD[THH:MM[:SS]] or now-N{days,hours,minutes}.\n")
+            sys.exit(1)
+        nodes = expand_hosts(args.nodes)
+        # -E is inclusive, as in sacct
+        level, hosts, rows = store.query(nodes, int(start.timestamp()), int(end.timestamp()) + 1, args.resolution)
+        out = series(hosts, rows)
+        if args.json:
+            print(json.dumps({"resolution": level, "records": out}, indent=2))
+            return
+        if not out:
+            sys.stderr.write(f"Error: no {level} samples for {', '.join(nodes)} in that range.\n")
+            sys.exit(1)
+        print(f"# {len(out)} {level} records")
+        print_series(out)
+        return
+
+    try:
+        jobs = sacct_job(args.jobid)
+    except (OSError, subprocess.CalledProcessError) as e:
+        sys.stderr.write(f"Error: sacct failed for job {args.jobid}: {e}\n")
+        sys.exit(1)
+    if not jobs:
+        sys.stderr.write(f"Error: sacct knows no job {args.jobid}.\n")
+        sys.exit(1)
+    reports = [job_report(store, job, args.margin * 60, args.resolution) for job in jobs]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for rep in reports:
+        job = rep["job"]
+        print(f"# job {job['JobID']} ({job['User']}, {job['Partition']}, {job['State']}) "
+              f"{job['Start']} .. {job['End']} on {job['NodeList']}")
+        if "error" in rep:
+            print(f"  {rep['error']}")
+            if "series" not in rep:
+                continue
+        print(f"  resolution {rep['resolution']}, margin {args.margin} min")
+        print_summary("before", rep["before"])
+        print_summary("during", rep["during"])
+        print_summary("after", rep["after"])
+        if args.series and rep["series"]:
+            print_series(rep["series"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# Purpose: fast module search for searchmod, without `module avail`.
+#   $MODULEPATH is crawled once into an on-disk index of every modulefile
+#   (name, version, whatis description) plus a trigram index of the names.
+#   Searches load the index and answer in milliseconds; typos and partial
+#   names still match (trigram overlap per name component, then fuzzy
+#   ranking, then difflib's close matches over the names as a last resort).
+#   The index remembers each directory's mtime. Once it is older than
+#   --max-age (or with `update`), only directories whose mtime changed are
+#   re-read -- adding or removing a modulefile changes its directory's
+#   mtime -- so a refresh is a stat per directory instead of a full walk.
+#   Directories of roots that drop out of MODULEPATH stay cached, so
+#   switching root lists back and forth does not re-crawl either.
+#   Point MODULE_INDEX (or --index) at a shared path to build it once for
+#   everyone, e.g. from cron.
+#
+# Usage: ./module_index.py search TERM [--limit N] [--desc] [--json]
+#        ./module_index.py update [--full]
+# Example: ./module_index.py search pytorch
+# Checks: python3 -m doctest module_index.py
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+INDEX = os.environ.get("MODULE_INDEX", os.path.expanduser("~/.cache/module_index.json"))
+MAX_AGE = 3600           # seconds before a search refreshes a stale index
+HEAD_BYTES = 16384       # whatis lines are near the top of a modulefile
+LIMIT = 30
+SKIP = {".version", ".modulerc", ".modulerc.lua", "default"}
+FORMAT = 2               # bump when the saved trigram index changes shape
+
+LUA_WHATIS = re.compile(r'whatis\s*\(\s*(?:"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'|\[\[(.*?)\]\])', re.S)
+TCL_WHATIS = re.compile(r'^\s*module-whatis\s+(?:\{(.*?)\}|"((?:[^"\\]|\\.)*)"|(\S.*))$', re.M)
+
+
+def describe(path: str) -> Optional[str]:
+    """The modulefile's description, "" if it has none, None if it is not a modulefile."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(HEAD_BYTES).decode(errors="replace")
+    except OSError:
+        return None
+    if path.endswith(".lua"):
+        found = ["".join(g) for g in LUA_WHATIS.findall(head)]
+    elif head.startswith("#%Module"):
+        found = ["".join(g) for g in TCL_WHATIS.findall(head)]
+    else:
+        return None
+    for text in found:
+        if text.lower().startswith("description:"):
+            return text.split(":", 1)[1].strip()
+    return found[0].strip() if found else ""
+
+
+def read_dir(root: str, path: str) -> Tuple[List[list], List[str]]:
+    """([name, version, description, file], ...) for modulefiles directly in path, and its subdirectories."""
+    entries, subdirs = [], []
+    rel = os.path.relpath(path, root)
+    for entry in sorted(os.scandir(path), key=lambda e: e.name):
+        if entry.name in SKIP or entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            subdirs.append(entry.path)
+            continue
+        desc = describe(entry.path)
+        if desc is None:
+            continue
+        leaf = entry.name[:-4] if entry.name.endswith(".lua") else entry.name
+        if rel == ".":
+            name, version = leaf, ""            # root/name.lua
+        else:
+            name, version = rel, leaf           # root/name/version[.lua]
+        entries.append([name, version, desc, entry.path])
+    return entries, subdirs
+
+
+def trigrams(text: str) -> List[str]:
+    text = f"  {text.lower()} "
+    return sorted({text[i:i + 3] for i in range(len(text) - 2)})
+
+
+class ModuleIndex:
+    """Modulefiles under the MODULEPATH roots, cached per directory mtime."""
+
+    def __init__(self, path: str = INDEX):
+        self.path = path
+        self.built = 0.0
+        self.roots: List[str] = []
+        self.dirs: Dict[str, dict] = {}
+        self.modules: List[list] = []
+        self.grams: Dict[str, List[int]] = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            self.built, self.roots, self.dirs = data["built"], data["roots"], data["dirs"]
+            self.modules, self.grams = data["modules"], data["grams"]
+            if data.get("format") != FORMAT:
+                self.built = 0.0            # directories are still good; grams are rebuilt on load
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def update(self, roots: List[str], full: bool = False) -> Tuple[int, int]:
+        """Re-read new or changed directories; returns (directories read, directories reused)."""
+        old = {} if full else self.dirs
+        dirs: Dict[str, dict] = {}
+        read = reused = 0
+        for root in roots:
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                cached = old.get(path)
+                if cached and cached["mtime"] == mtime and cached["root"] == root:
+                    dirs[path] = cached
+                    reused += 1
+                else:
+                    try:
+                        entries, subdirs = read_dir(root, path)
+                    except OSError:
+                        continue
+                    dirs[path] = {"root": root, "mtime": mtime, "entries": entries, "subdirs": subdirs}
+                    read += 1
+                stack.extend(reversed(dirs[path]["subdirs"]))
+        # keep other roots' directories too: a hierarchical MODULEPATH (after `module load gcc`)
+        # or users sharing one index switch between root lists, and switching back is then a stat
+        for path, cached in old.items():
+            if path not in dirs and cached["root"] not in roots:
+                dirs[path] = cached
+        self.roots, self.dirs = roots, dirs
+        # earlier MODULEPATH entries shadow later ones, as in Lmod
+        seen = set()
+        self.modules = []
+        for root in roots:
+            for path in sorted(p for p, d in dirs.items() if d["root"] == root):
+                for name, version, desc, _ in dirs[path]["entries"]:
+                    key = f"{name}/{version}" if version else name
+                    if key not in seen:
+                        seen.add(key)
+                        self.modules.append([key, desc])
+        self.modules.sort(key=lambda m: m[0].lower())
+        self.index_names()
+        self.built = time.time()
+        return read, reused
+
+    def index_names(self) -> None:
+        """Trigrams of each name/version component, so a typo in a name is not drowned out by the version."""
+        self.grams = {}
+        for i, (key, _) in enumerate(self.modules):
+            for g in sorted({g for part in key.split("/") for g in trigrams(part)}):
+                self.grams.setdefault(g, []).append(i)
+
+    def save(self) -> None:
+        data = {"format": FORMAT, "built": self.built, "roots": self.roots, "dirs": self.dirs,
+                "modules": self.modules, "grams": self.grams}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def search(self, term: str, limit: int = LIMIT, desc: bool = False) -> List[Tuple[float, str, str]]:
+        """(score, module, description), best first. Substring matches score 1 and up.
+
+        >>> index = ModuleIndex("/nonexistent")
+        >>> index.modules = [["gcc/12.2.0", ""], ["openmpi/4.1.4", ""], ["python/3.9.4", ""]]
+        >>> index.index_names()
+        >>> [m for _, m, _ in index.search("pyhton")]
+        ['python/3.9.4']
+        >>> [m for _, m, _ in index.search("opnempi")]
+        ['openmpi/4.1.4']
+        """
+        term_l = term.lower()
+        scores: Dict[int, float] = {}
+        for i, (key, text) in enumerate(self.modules):
+            if term_l in key.lower():
+                # exact name, then prefix, then anywhere
+                name = key.lower().split("/")[0]
+                scores[i] = 3.0 if name == term_l else 2.0 if key.lower().startswith(term_l) else 1.0
+            elif desc and term_l in text.lower():
+                scores[i] = 0.9
+        grams = trigrams(term)
+        hits: Dict[int, int] = {}
+        for g in grams:
+            for i in self.grams.get(g, ()):
+                hits[i] = hits.get(i, 0) + 1
+        for i, n in hits.items():
+            if i in scores or n < len(grams) * 0.4:
+                continue
+            # rank trigram candidates by how well they match as a whole
+            key = self.modules[i][0].lower()
+            ratio = max(difflib.SequenceMatcher(None, term_l, part).ratio() for part in [key] + key.split("/"))
+            if ratio >= 0.5:
+                scores[i] = ratio * 0.8
+        if not scores:
+            # nothing shares enough trigrams: closest names by edit similarity
+            names: Dict[str, List[int]] = {}
+            for i, (key, _) in enumerate(self.modules):
+                names.setdefault(key.lower().split("/")[0], []).append(i)
+            for name in difflib.get_close_matches(term_l, list(names), n=limit, cutoff=0.6):
+                ratio = difflib.SequenceMatcher(None, term_l, name).ratio()
+                for i in names[name]:
+                    scores[i] = ratio * 0.8
+        best = sorted(scores.items(), key=lambda kv: (-kv[1], self.modules[kv[0]][0].lower()))[:limit]
+        return [(round(s, 3), *self.modules[i]) for i, s in best]
+
+
+def modulepath() -> List[str]:
+    return [p for p in os.environ.get("MODULEPATH", "").split(":") if p]
+
+
+def load(path: str, max_age: float, roots: List[str]) -> ModuleIndex:
+    """The index, refreshed first if it is older than max_age or MODULEPATH changed."""
+    index = ModuleIndex(path)
+    if time.time() - index.built > max_age or index.roots != roots:
+        index.update(roots)
+        try:
+            index.save()
+        except OSError as e:
+            # a shared read-only index: still answer from the refreshed copy
+            sys.stderr.write(f"Warning: cannot write {path}: {e.strerror}\n")
+    return index
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index", default=INDEX, help=f"index file (default $MODULE_INDEX or {INDEX})")
+    common.add_argument("--modulepath", help="colon-separated roots (default $MODULEPATH)")
+
+    p = argparse.ArgumentParser(description="Indexed search over the modulefiles in $MODULEPATH.")
+    sub = p.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("search", parents=[common], help="find modules by (partial, misspelt) name")
+    s.add_argument("term")
+    s.add_argument("-n", "--limit", type=int, default=LIMIT, help=f"results to show (default {LIMIT})")
+    s.add_argument("-d", "--desc", action="store_true", help="also match descriptions")
+    s.add_argument("--max-age", type=float, default=MAX_AGE,
+                   help=f"refresh the index first if older than this many seconds (default {MAX_AGE})")
+    s.add_argument("--json", action="store_true", help="print results as JSON")
+    u = sub.add_parser("update", parents=[common], help="refresh the index now")
+    u.add_argument("--full", action="store_true", help="re-read every directory, not just changed ones")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    roots = args.modulepath.split(":") if args.modulepath else modulepath()
+    roots = [r for r in roots if r]
+    if not roots:
+        sys.stderr.write("Error: MODULEPATH is empty; load the module system or pass --modulepath.\n")
+        sys.exit(1)
+
+    if args.command == "update":
+        t0 = time.monotonic()
+        index = ModuleIndex(args.index)
+        read, reused = index.update(roots, args.full)
+        try:
+            index.save()
+        except OSError as e:
+            sys.stderr.write(f"Error: cannot write {args.index}: {e.strerror}\n")
+            sys.exit(1)
+        print(f"Indexed {len(index.modules)} modules: {read} directories read, {reused} unchanged, "
+              f"{time.monotonic() - t0:.2f}s")
+        return
+
+    results = load(args.index, args.max_age, roots).search(args.term, args.limit, args.desc)
+    if args.json:
+        print(json.dumps([{"module": m, "description": d, "score": s} for s, m, d in results], indent=2))
+        return
+    if not results:
+        sys.exit(1)
+    width = max(len(m) for _, m, _ in results)
+    for _, module, desc in results:
+        print(f"{module:<{width}}  {desc}" if desc else module)
+
+
+if __name__ == "__main__":
+    main()
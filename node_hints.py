@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Purpose: steer Jupyter sessions away from nodes that are already busy.
+#   Slurm only knows what it allocated; Ganglia knows what the node is
+#   actually doing (co-tenants, runaway processes, memory pressure). For a
+#   partition, nodes that sinfo reports idle or mixed are ranked by Ganglia
+#   load per CPU and free memory, and turned into sbatch options:
+#     exclude   --exclude= the saturated ones (default). Slurm still picks
+#               among everything else, so this costs no queue time.
+#     nodelist  --nodelist= the single least-loaded node with free CPUs;
+#               best interactivity, but the job waits for that node.
+#   (--prefer takes node features, not node names, so it cannot express
+#   this.) The best few nodes are never excluded, and nodes Ganglia does
+#   not know about are left alone. Hints are cached for HINTS_TTL seconds
+#   in the queue_wait cache file. So is a failure to reach gmetad, which is
+#   given only HINTS_CONNECT_TIMEOUT seconds: launches then go ahead without
+#   hints instead of each waiting on an unreachable gmetad.
+#
+# Usage (on a login node): ./node_hints.py -p PARTITION [--mode exclude|nodelist] [--direct HOST:PORT]
+# Example: ./node_hints.py -p mit_normal --mode exclude
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ganglia_client import GMETAD, Snapshot, direct_snapshot, parse_target, short, ssh_snapshot
+from queue_wait import Cache, CACHE_PATH, Execute, local_execute
+
+HINTS_TTL = 60              # seconds; load changes quickly
+HINTS_CONNECT_TIMEOUT = 5   # seconds to reach gmetad before giving up on hints
+HINTS_READ_TIMEOUT = 20     # seconds without data from gmetad
+LOAD_LIMIT = 0.8            # load per CPU above this is saturated
+MEM_LIMIT = 0.1             # or less than this fraction of memory free
+KEEP = 3                    # never exclude the best KEEP usable nodes
+UNAVAILABLE = "hints:unavailable"   # cache key of the last failure to get a snapshot
+MODES = ("exclude", "nodelist")
+
+
+def usable_nodes(execute: Execute, partition: str) -> Dict[str, int]:
+    """Nodes in the partition that can take a job now (idle/mixed) -> idle CPUs."""
+    out, _ = execute(f"sinfo -h -N -p {partition} -o '%N %T %C'")
+    nodes = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        name, state, cpus = fields[0], fields[1].lower().rstrip("*~#!%$@^-+"), fields[2]
+        if state not in ("idle", "mixed"):
+            continue
+        try:
+            nodes[short(name)] = int(cpus.split("/")[1])
+        except (IndexError, ValueError):
+            continue
+    return nodes
+
+
+def choose(snapshot: Snapshot, usable: Dict[str, int], mode: str = "exclude",
+           cpus: int = 1) -> Tuple[List[str], List[dict]]:
+    """(sbatch options, ranked rows of the usable nodes Ganglia reports on)."""
+    names = [n for n, idle in usable.items() if idle >= cpus]
+    idx = snapshot.select(names)
+    if not len(idx):
+        return [], []
+    load = snapshot.load_per_cpu()[idx]
+    free = np.nan_to_num(snapshot.mem_free_fraction()[idx], nan=1.0)
+    order = idx[np.lexsort((-free, load))]
+    rows = [snapshot.row(i) for i in order]
+    if mode == "nodelist":
+        return [f"--nodelist={rows[0]['host']}"], rows
+    saturated = [r["host"] for r in rows[KEEP:]
+                 if (r["load_per_cpu"] or 0) > LOAD_LIMIT
+                 or (r["mem_free_fraction"] is not None and r["mem_free_fraction"] < MEM_LIMIT)]
+    return ([f"--exclude={','.join(sorted(saturated))}"] if saturated else []), rows
+
+
+def node_hints(execute: Execute, snapshot_fn, partition: str, mode: str = "exclude", cpus: int = 1,
+               cache: Optional[Cache] = None) -> List[str]:
+    """sbatch options for partition, from cache if fresh; [] when metrics are unavailable.
+
+    snapshot_fn() returns a ganglia_client.Snapshot; it is only called on a cache miss.
+    """
+    cache = cache or Cache()
+    key = f"hints:{partition}:{mode}:{cpus}"
+    hints = cache.get(key, HINTS_TTL)
+    if hints is not None:
+        return hints
+    # a recent failure is not retried until it expires like a snapshot would
+    error = cache.get(UNAVAILABLE, HINTS_TTL)
+    if error is not None:
+        sys.stderr.write(f"Warning: no node load hints ({error}; cached)\n")
+        return []
+    try:
+        hints, _ = choose(snapshot_fn(), usable_nodes(execute, partition), mode, cpus)
+    except Exception as e:  # no tunnel, no gmetad, bad XML: submit without hints
+        sys.stderr.write(f"Warning: no node load hints ({e})\n")
+        cache.put(UNAVAILABLE, str(e) or type(e).__name__)
+        return []
+    cache.put(key, hints)
+    return hints
+
+
+def ssh_node_hints(ssh, partition: str, mode: str = "exclude", cpus: int = 1,
+                   target=GMETAD) -> List[str]:
+    """node_hints() over the launcher's paramiko session: sinfo and the gmetad tunnel both use it."""
+    from ganglia_client import ssh_execute
+
+    return node_hints(ssh_execute(ssh),
+                      lambda: ssh_snapshot(ssh, target, HINTS_READ_TIMEOUT, HINTS_CONNECT_TIMEOUT),
+                      partition, mode, cpus)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="sbatch node hints from Ganglia load and sinfo state.")
+    p.add_argument("-p", "--partition", required=True)
+    p.add_argument("--mode", choices=MODES, default="exclude", help="kind of hint (default exclude)")
+    p.add_argument("-c", "--cpus", type=int, default=1, help="CPUs the job needs (default 1)")
+    p.add_argument("--direct", default=f"{GMETAD[0]}:{GMETAD[1]}",
+                   help=f"gmetad XML address (default {GMETAD[0]}:{GMETAD[1]})")
+    p.add_argument("--no-cache", action="store_true", help="ignore and do not write the cache")
+    p.add_argument("--json", action="store_true", help="print hints and node ranking as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.json:
+        # the ranking is wanted, so always compute it
+        try:
+            snapshot = direct_snapshot(*parse_target(args.direct))
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Error: cannot read Ganglia metrics: {e}\n")
+            sys.exit(1)
+        hints, rows = choose(snapshot, usable_nodes(local_execute, args.partition), args.mode, args.cpus)
+        print(json.dumps({"hints": hints, "nodes": rows}, indent=2))
+        return
+    cache = Cache(None if args.no_cache else CACHE_PATH)
+    hints = node_hints(local_execute,
+                       lambda: direct_snapshot(*parse_target(args.direct), HINTS_READ_TIMEOUT, HINTS_CONNECT_TIMEOUT),
+                       args.partition, args.mode, args.cpus, cache)
+    print(" ".join(hints))
+
+
+if __name__ == "__main__":
+    main()
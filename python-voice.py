@@ -1,34 +1,556 @@
 from pydub import AudioSegment
 import speech_recognition as sr
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
 
 #Stolen from Michel
 
-# Step 1: Convert the audio file to WAV if not already in that format
-def convert_to_wav(input_file, output_file):
+# Everything is recognized as 16 kHz, 16-bit mono PCM: the recognizers
+# don't need more, and it is ~1/5 the size of CD-quality stereo.
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+LANGUAGE = 'es-ES'
+# Long recordings are cut into chunks of at most this many seconds, so no
+# single request is large and chunks can be recognized in parallel.
+CHUNK_SECONDS = 30
+BACKEND = 'google'
+WHISPER_MODEL = 'base'
+# Finished transcripts, keyed by audio content + backend + language + chunking
+CACHE_DIR = os.path.expanduser('~/.cache/python-voice')
+# Voice-activity detection: 30 ms frames are speech when they are well above
+# the noise floor (the quiet end of the frame energies), or somewhat above
+# it with a high zero-crossing rate (unvoiced consonants: s, f, ch).
+FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000
+SPEECH_DB = 12           # dB over the noise floor
+CONSONANT_DB = 6         # ... or this much with a zero-crossing rate of
+CONSONANT_ZCR = 0.25     # at least this (crossings per sample)
+MIN_PAUSE = 0.5          # seconds of silence that end a segment
+MIN_SPEECH = 0.25        # seconds; shorter bursts are clicks and coughs
+PAD = 0.2                # seconds kept around each segment
+MIN_CHUNK_SECONDS = 1    # shortest --chunk-seconds; a chunk must span many frames
+VAD_BLOCK_SECONDS = 300  # audio analysed at a time; the noise floor adapts per block
+FLOOR_DRIFT_DB = 3       # ... by at most this much upwards
+FLOOR_MAX_DB = -40       # and never above this (dBFS): a recording with no pauses has no quiet end
+VAD_VERSION = 2          # part of the cache key; bump when the VAD changes what is recognized
+# Exit status when the run finished but some files (or chunks) could not be
+# transcribed; 1 stays for errors that stop the run. voice_array.py relies on it.
+EXIT_PARTIAL = 3
+AUDIO_EXTS = {'.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.wma', '.webm', '.mp4'}
+
+# Step 1: Decode the audio file straight to 16 kHz mono PCM in memory
+def ffmpeg_path():
+    """The ffmpeg pydub is configured to use, if it can be found."""
+    return shutil.which(AudioSegment.converter)
+
+def iter_pcm(input_file, chunk_bytes=1 << 20):
+    """Yield raw 16 kHz mono s16le PCM in chunks of chunk_bytes (the last may be short).
+
+    With ffmpeg the file is decoded, downmixed and resampled in one pass
+    and streamed through a pipe, so the full-rate decode never exists in
+    memory. Without it (WAV input only) pydub decodes and converts once.
+    """
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        pcm = memoryview(decode_with_pydub(input_file))
+        for i in range(0, len(pcm), chunk_bytes):
+            yield pcm[i:i + chunk_bytes]
+        return
+    cmd = [ffmpeg, '-nostdin', '-loglevel', 'error', '-i', input_file,
+           '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        while True:
+            chunk = proc.stdout.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+def decode_with_pydub(input_file):
     audio = AudioSegment.from_file(input_file)
-    audio.export(output_file, format="wav")
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(SAMPLE_WIDTH)
+    return audio.raw_data
+
+def iter_chunks(input_file, chunk_seconds=CHUNK_SECONDS, vad=True):
+    """Yield (start seconds, end seconds, PCM bytes) for the pieces to recognize.
+
+    With vad, only speech is yielded, cut at pauses (see iter_speech);
+    otherwise the whole file in consecutive chunk_seconds pieces. If the
+    VAD finds no speech at all, the whole file is used after all.
+    """
+    if vad:
+        stats = {}
+        speech = 0.0
+        for start, end, pcm in iter_speech(input_file, chunk_seconds, stats):
+            speech += end - start
+            yield start, end, pcm
+        total = stats.get('seconds', 0.0)
+        if speech:
+            if speech < total / 2:
+                sys.stderr.write(f"{input_file}: skipped {total - speech:.1f} of {total:.1f} s as silence\n")
+            return
+        if total:
+            sys.stderr.write(f"Warning: {input_file}: no speech detected in {total:.1f} s; "
+                             "transcribing all of it\n")
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+    offset = 0
+    for pcm in iter_pcm(input_file, chunk_bytes):
+        n = len(pcm) // SAMPLE_WIDTH
+        yield offset / SAMPLE_RATE, (offset + n) / SAMPLE_RATE, bytes(pcm)
+        offset += n
+
+# Step 1b: Skip silence
+def frame_features(samples):
+    """Energy (dBFS) and zero-crossing rate of each whole frame of int16 samples."""
+    n = len(samples) // FRAME_SAMPLES
+    frames = samples[:n * FRAME_SAMPLES].reshape(n, FRAME_SAMPLES).astype(np.float32)
+    energy = 10 * np.log10(np.mean(frames * frames, axis=1) / (32768.0 * 32768.0) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / FRAME_SAMPLES
+    return energy, zcr
+
+def noise_floor(energy, previous=None):
+    """The 10th percentile frame energy, allowed to rise only FLOOR_DRIFT_DB a
+    block and never above FLOOR_MAX_DB, so continuous speech does not become
+    its own floor."""
+    floor = float(np.percentile(energy, 10)) if len(energy) else -100.0
+    if previous is not None:
+        floor = min(floor, previous + FLOOR_DRIFT_DB)
+    return min(floor, FLOOR_MAX_DB)
+
+def speech_runs(energy, zcr, floor):
+    """[(first frame, end frame), ...] of speech, pauses shorter than MIN_PAUSE bridged."""
+    if not len(energy):
+        return []
+    speech = (energy > floor + SPEECH_DB) | ((energy > floor + CONSONANT_DB) & (zcr >= CONSONANT_ZCR))
+    edges = np.diff(np.r_[0, speech.astype(np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return []
+    # bridge short gaps, then drop what is still too short to be speech
+    gap = FRAME_SAMPLES / SAMPLE_RATE
+    keep = np.r_[True, (starts[1:] - ends[:-1]) * gap >= MIN_PAUSE]
+    starts = starts[keep]
+    ends = ends[np.r_[keep[1:], True]]
+    long_enough = (ends - starts) * gap >= MIN_SPEECH
+    return list(zip(starts[long_enough].tolist(), ends[long_enough].tolist()))
+
+def split_at_pauses(start, end, energy, max_frames):
+    """Cut [start, end) into pieces of at most max_frames, each at the quietest
+    frame in the second half of the allowed length."""
+    pieces = []
+    while end - start > max_frames:
+        # cut > start, so every piece is at least one frame long
+        lo = start + max(max_frames // 2, 1)
+        cut = lo + int(np.argmin(energy[lo:max(start + max_frames, lo + 1)]))
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+def iter_speech(input_file, max_seconds=CHUNK_SECONDS, stats=None):
+    """Yield (start seconds, end seconds, PCM bytes) for each speech segment.
+
+    The file is analysed VAD_BLOCK_SECONDS at a time. A segment still open
+    at the end of a block is carried into the next one, so segments are
+    never cut at block edges, only at pauses or when they reach max_seconds.
+    Times are those of the original recording. stats, if given, gets the
+    recording's length as 'seconds' once it has been read.
+    """
+    pad = int(PAD * SAMPLE_RATE / FRAME_SAMPLES)
+    pause = int(np.ceil(MIN_PAUSE * SAMPLE_RATE / FRAME_SAMPLES))
+    max_frames = max(int(max_seconds * SAMPLE_RATE / FRAME_SAMPLES), 1)
+    block_bytes = VAD_BLOCK_SECONDS * SAMPLE_RATE * SAMPLE_WIDTH
+    carry = np.zeros(0, dtype=np.int16)
+    base = 0                  # sample offset of carry[0] in the recording
+    floor = None
+    blocks = iter_pcm(input_file, block_bytes)
+    block = next(blocks, None)
+    while block is not None:
+        following = next(blocks, None)
+        last = following is None
+        buf = np.concatenate([carry, np.frombuffer(block, dtype=np.int16)])
+        energy, zcr = frame_features(buf)
+        floor = noise_floor(energy, floor)
+        nframes = len(energy)
+        # frames from here on are carried into the next block
+        carry_from = nframes if last else max(nframes - pad, 0)
+        for s, e in speech_runs(energy, zcr, floor):
+            still_open = not last and e > nframes - pause
+            if still_open:
+                # may continue past this block: emit the full-length pieces, keep the rest
+                pieces = split_at_pauses(max(s - pad, 0), nframes, energy, max_frames)
+                carry_from = pieces[-1][0]
+                pieces = pieces[:-1]
+            else:
+                pieces = split_at_pauses(max(s - pad, 0), min(e + pad, nframes), energy, max_frames)
+            for a, b in pieces:
+                pcm = buf[a * FRAME_SAMPLES:b * FRAME_SAMPLES]
+                yield ((base + a * FRAME_SAMPLES) / SAMPLE_RATE,
+                       (base + b * FRAME_SAMPLES) / SAMPLE_RATE, pcm.tobytes())
+            if still_open:
+                break
+        if last and stats is not None:
+            stats['seconds'] = (base + len(buf)) / SAMPLE_RATE
+        carry = buf[carry_from * FRAME_SAMPLES:]
+        base += carry_from * FRAME_SAMPLES
+        block = following
+
+# Step 2: Transcribe the audio
+# A backend takes (16 kHz mono s16le PCM bytes, language like 'es-ES') and
+# returns the text, raising sr.UnknownValueError when nothing was recognized.
+# Backends that need the network run in threads; offline ones are CPU-bound
+# and run in processes.
+def recognize_google(pcm, language):
+    # Google Web Speech API, needs the network
+    audio_data = sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+    return sr.Recognizer().recognize_google(audio_data, language=language)
+
+def recognize_sphinx(pcm, language):
+    # CMU PocketSphinx, offline; needs the pocketsphinx model for the language
+    audio_data = sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+    return sr.Recognizer().recognize_sphinx(audio_data, language=language)
+
+_whisper_model = None
+
+def recognize_whisper(pcm, language):
+    # OpenAI Whisper on the CPU, offline. The model is loaded once per
+    # worker process rather than once per chunk.
+    global _whisper_model
+    import whisper
+    if _whisper_model is None:
+        _whisper_model = whisper.load_model(WHISPER_MODEL, device='cpu')
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    result = _whisper_model.transcribe(samples, language=language.split('-')[0].lower(), fp16=False)
+    text = result['text'].strip()
+    if not text:
+        raise sr.UnknownValueError()
+    return text
+
+# name -> (function, needs the network)
+BACKENDS = {
+    'google': (recognize_google, True),
+    'sphinx': (recognize_sphinx, False),
+    'whisper': (recognize_whisper, False),
+}
+
+# Chunks the recognizer failed on (network, missing model) are kept in the
+# transcript as text starting with this, and such results are never cached.
+ERROR_MARK = "[speech recognition error:"
+
+def cacheable(segments):
+    return not any(text.startswith(ERROR_MARK) for _, _, text in segments)
+
+def transcribe_chunk(backend, pcm, language):
+    recognize, _ = BACKENDS[backend]
+    try:
+        return recognize(pcm, language)
+    except sr.UnknownValueError:
+        return ""
+    except sr.RequestError as e:
+        return f"{ERROR_MARK} {e}]"
+
+def transcribe_audio(chunks, backend=BACKEND, language=LANGUAGE, jobs=None):
+    """Yield (start, end, text) for each (start, end, pcm) chunk, in order.
+
+    At most 2 * jobs chunks are in flight, so memory stays bounded however
+    long the recording is. jobs=1 recognizes inline, without a pool.
+    """
+    _, network = BACKENDS[backend]
+    if jobs == 1:
+        for start, end, pcm in chunks:
+            yield start, end, transcribe_chunk(backend, pcm, language)
+        return
+    jobs = jobs or (8 if network else os.cpu_count() or 1)
+    pool_class = ThreadPoolExecutor if network else ProcessPoolExecutor
+    with pool_class(max_workers=jobs) as pool:
+        pending = deque()
+        for start, end, pcm in chunks:
+            pending.append((start, end, pool.submit(transcribe_chunk, backend, pcm, language)))
+            if len(pending) >= 2 * jobs:
+                start, end, future = pending.popleft()
+                yield start, end, future.result()
+        while pending:
+            start, end, future = pending.popleft()
+            yield start, end, future.result()
+
+def transcribe_file(input_file, backend=BACKEND, language=LANGUAGE, chunk_seconds=CHUNK_SECONDS,
+                    jobs=None, vad=True):
+    """[[start, end, text], ...] for one file."""
+    chunks = iter_chunks(input_file, chunk_seconds, vad)
+    return [[start, end, text] for start, end, text in transcribe_audio(chunks, backend, language, jobs)]
+
+# Step 3: Cache results by what was recognized, not where the file lives
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def stamped_hash(path):
+    """((size, mtime_ns) before reading, sha256) of path."""
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns), file_hash(path)
+
+def result_key(digest, backend, language, chunk_seconds, vad=True):
+    extra = backend if backend != 'whisper' else f'whisper-{WHISPER_MODEL}'
+    return f'{digest}-{extra}-{language}-{chunk_seconds:g}{f"-vad{VAD_VERSION}" if vad else ""}'
+
+class ResultCache:
+    """Transcripts on disk under sha256(audio)/backend/language/chunking.
+
+    Hashing a large archive on every run would cost as much I/O as reading
+    it, so hashes are remembered per (path, size, mtime) in index.json and
+    only new or changed files are re-read.
+    """
 
-# Step 2: Transcribe the WAV file
-def transcribe_audio(wav_file):
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(wav_file) as source:
-        audio_data = recognizer.record(source)
+    def __init__(self, directory=CACHE_DIR, load_index=True):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.index = {}
+        self.index_dirty = False
+        if not load_index:
+            return
         try:
-            # Use Google Web Speech API for transcription
-            return recognizer.recognize_google(audio_data, language='es-ES')
-        except sr.UnknownValueError:
-            return "Unable to understand the audio."
-        except sr.RequestError as e:
-            return f"Speech recognition error: {e}"
-
-# Paths to your audio files
-input_file = sys.argv[1]  # Replace with your input file path
-output_file = "/Users/erbmi1/Downloads/converted_audio.wav"
-
-# Convert and transcribe
-convert_to_wav(input_file, output_file)
-transcription = transcribe_audio(output_file)
-
-print("Transcription:")
-print(transcription)
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def known_hash(self, path):
+        """The remembered hash of path if it is unchanged since, else None (no file is read)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.index.get(os.path.realpath(path))
+        if entry and entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return entry[2]
+        return None
+
+    def remember(self, path, stamp, digest):
+        self.index[os.path.realpath(path)] = list(stamp) + [digest]
+        self.index_dirty = True
+
+    def audio_hash(self, path):
+        digest = self.known_hash(path)
+        if digest is None:
+            stamp, digest = stamped_hash(path)
+            self.remember(path, stamp, digest)
+        return digest
+
+    def key(self, path, backend, language, chunk_seconds, vad=True):
+        return result_key(self.audio_hash(path), backend, language, chunk_seconds, vad)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)['segments']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, input_file, segments):
+        self._write(self.path(key), {'file': input_file, 'segments': segments})
+
+    def save_index(self):
+        if self.index_dirty:
+            self._write(self.index_path, self.index)
+            self.index_dirty = False
+
+    def _write(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}'
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+def collect_inputs(paths, list_file=None):
+    """Files named on the command line or in list_file; directories are walked for audio files."""
+    if list_file:
+        with (sys.stdin if list_file == '-' else open(list_file)) as f:
+            paths = list(paths) + [line.strip() for line in f if line.strip()]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if os.path.splitext(n)[1].lower() in AUDIO_EXTS)
+        else:
+            files.append(path)
+    return files
+
+def transcribe_cached(input_file, backend, language, chunk_seconds, vad, cache_dir, digest):
+    """Worker side of transcribe_batch: (stamp, digest, segments, cached).
+
+    The file is hashed here, in parallel, unless its hash is already known;
+    a transcript cached under that hash is returned without decoding.
+    """
+    stamp = None
+    if cache_dir is not None:
+        if digest is None:
+            stamp, digest = stamped_hash(input_file)
+        segments = ResultCache(cache_dir, load_index=False).get(
+            result_key(digest, backend, language, chunk_seconds, vad))
+        if segments is not None:
+            return stamp, digest, segments, True
+    return stamp, digest, transcribe_file(input_file, backend, language, chunk_seconds, 1, vad), False
+
+def transcribe_batch(files, backend=BACKEND, language=LANGUAGE, chunk_seconds=CHUNK_SECONDS,
+                     jobs=None, cache=None, vad=True):
+    """Yield (file, segments or None, error or None, cached) for every file, in order.
+
+    Files whose hash is known and whose transcript is cached are answered
+    without reading them. The rest are spread over a process pool, one file
+    per worker, each hashing it and recognizing its chunks inline. At most
+    2 * jobs files are in flight, so results stream out as they finish.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    cache_dir = cache.directory if cache else None
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+
+        def finish(input_file, future):
+            try:
+                stamp, digest, segments, cached = future.result()
+            except Exception as e:  # CalledProcessError, decode errors, BrokenProcessPool, ...: report, keep going
+                return input_file, None, str(e), False
+            if cache:
+                if stamp is not None:
+                    cache.remember(input_file, stamp, digest)
+                if not cached and cacheable(segments):
+                    cache.put(result_key(digest, backend, language, chunk_seconds, vad), input_file, segments)
+            return input_file, segments, None, cached
+
+        in_flight = 0
+        for input_file in files:
+            digest = cache.known_hash(input_file) if cache else None
+            segments = cache.get(result_key(digest, backend, language, chunk_seconds, vad)) if digest else None
+            if segments is not None:
+                pending.append((input_file, segments))
+            else:
+                pending.append((input_file, pool.submit(transcribe_cached, input_file, backend, language,
+                                                        chunk_seconds, vad, cache_dir, digest)))
+                in_flight += 1
+            while pending and (isinstance(pending[0][1], list) or in_flight >= 2 * jobs):
+                input_file, result = pending.popleft()
+                if isinstance(result, list):
+                    yield input_file, result, None, True
+                else:
+                    in_flight -= 1
+                    yield finish(input_file, result)
+        while pending:
+            input_file, result = pending.popleft()
+            yield (input_file, result, None, True) if isinstance(result, list) else finish(input_file, result)
+    if cache:
+        cache.save_index()
+
+def format_timestamp(seconds):
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{int(h):02d}:{int(m):02d}:{s:06.3f}"
+
+def print_segments(segments, timestamps):
+    if timestamps:
+        for start, end, text in segments:
+            print(f"[{format_timestamp(start)} - {format_timestamp(end)}] {text}")
+    else:
+        print(" ".join(text for _, _, text in segments if text))
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Transcribe audio files.")
+    p.add_argument("inputs", nargs="*", metavar="PATH",
+                   help="audio file or directory of them (anything ffmpeg reads; WAV only without ffmpeg)")
+    p.add_argument("-f", "--file-list", metavar="FILE", help="file with one audio path per line ('-' for stdin)")
+    p.add_argument("-b", "--backend", choices=sorted(BACKENDS), default=BACKEND,
+                   help=f"recognizer (default {BACKEND}; sphinx and whisper run offline on the CPU)")
+    p.add_argument("-l", "--language", default=LANGUAGE, help=f"language (default {LANGUAGE})")
+    p.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS,
+                   help=f"longest piece sent to the recognizer at once (default {CHUNK_SECONDS})")
+    p.add_argument("-j", "--jobs", type=int,
+                   help="chunks (one file) or files (batch) recognized at once "
+                        "(default: CPUs; 8 for network backends on one file)")
+    p.add_argument("--no-vad", dest="vad", action="store_false",
+                   help="recognize the whole recording instead of only the speech in it")
+    p.add_argument("--timestamps", action="store_true", help="print each chunk with its start and end time")
+    p.add_argument("--jsonl", metavar="OUT",
+                   help="write one JSON record per file (file, segments, error, cached) to OUT instead of text")
+    p.add_argument("--cache-dir", default=CACHE_DIR, help=f"result cache (default {CACHE_DIR})")
+    p.add_argument("--no-cache", action="store_true", help="neither read nor write the result cache")
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.chunk_seconds < MIN_CHUNK_SECONDS:
+        sys.stderr.write(f"Error: --chunk-seconds must be at least {MIN_CHUNK_SECONDS}.\n")
+        sys.exit(1)
+    files = collect_inputs(args.inputs, args.file_list)
+    if not files:
+        sys.stderr.write("Error: no audio files given.\n")
+        sys.exit(1)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+
+    # One file: its chunks are recognized in parallel
+    if len(files) == 1 and not args.file_list and not args.jsonl and not os.path.isdir(args.inputs[0]):
+        input_file = files[0]
+        try:
+            key = cache.key(input_file, args.backend, args.language, args.chunk_seconds, args.vad) if cache else None
+            segments = cache.get(key) if cache else None
+            if segments is None:
+                segments = transcribe_file(input_file, args.backend, args.language, args.chunk_seconds,
+                                           args.jobs, args.vad)
+                if cache and cacheable(segments):
+                    cache.put(key, input_file, segments)
+        except Exception as e:  # missing file, CalledProcessError, decode errors, ...: as in batch mode
+            sys.stderr.write(f"Error: {input_file}: {e}\n")
+            sys.exit(1)
+        finally:
+            if cache:
+                cache.save_index()
+        print("Transcription:")
+        print_segments(segments, args.timestamps)
+        if not cacheable(segments):
+            sys.exit(EXIT_PARTIAL)
+        return
+
+    # Batch: files are recognized in parallel, cached ones skipped
+    out = open(args.jsonl, 'w') if args.jsonl else None
+    failed = 0
+    for input_file, segments, error, cached in transcribe_batch(
+            files, args.backend, args.language, args.chunk_seconds, args.jobs, cache, args.vad):
+        if out:
+            out.write(json.dumps({'file': input_file, 'segments': segments, 'error': error,
+                                  'cached': cached}) + '\n')
+        if error is not None:
+            sys.stderr.write(f"Error: {input_file}: {error}\n")
+            failed += 1
+            continue
+        if not cacheable(segments):
+            sys.stderr.write(f"Error: {input_file}: the recognizer failed on some chunks\n")
+            failed += 1
+        if not out:
+            print(f"== {input_file}{' (cached)' if cached else ''} ==")
+            print_segments(segments, args.timestamps)
+    if out:
+        out.close()
+    if failed:
+        sys.exit(EXIT_PARTIAL)
+
+if __name__ == "__main__":
+    main()
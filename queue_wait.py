@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# Purpose: predict queue wait before submitting, so the Jupyter launcher
+#   can pick the partition/walltime that should start soonest.
+#   For each candidate (partition, walltime) two signals are combined:
+#     - `sbatch --test-only`: slurmctld's current estimate of the start time
+#     - history: the Submit -> Start waits of recent jobs in that partition
+#       with a similar time limit and CPU count (sacct)
+#   Results are cached on disk for a short TTL so a burst of launches
+#   (or several launcher windows) does not hammer slurmctld/slurmdbd.
+#
+#   Commands run through an `execute(cmd) -> (stdout, stderr)` callable,
+#   so the launcher can run them over its paramiko session and this file
+#   needs nothing beyond the standard library.
+#
+# Usage (on a login node): ./queue_wait.py -c mit_normal=03:00:00 -c mit_normal=01:00:00 [--cpus 4]
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+Execute = Callable[[str], Tuple[str, str]]
+
+CACHE_PATH = os.path.expanduser("~/.cache/orcd-launcher/queue_wait.json")
+TEST_ONLY_TTL = 120      # seconds; slurmctld's plan changes quickly
+HISTORY_TTL = 900        # seconds; the wait distribution changes slowly
+HISTORY_WINDOW = "now-3days"
+MIN_SIMILAR = 20         # fewer similar jobs than this -> use the whole partition
+SLURM_TIME = "%Y-%m-%dT%H:%M:%S"
+
+
+def local_execute(cmd: str) -> Tuple[str, str]:
+    out = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return out.stdout, out.stderr
+
+
+def walltime_minutes(walltime: str) -> int:
+    """Slurm time limit ([D-]HH:MM:SS, HH:MM or MM) -> minutes."""
+    days = 0
+    if "-" in walltime:
+        d, walltime = walltime.split("-", 1)
+        days = int(d)
+    parts = [int(p) for p in walltime.split(":")]
+    if len(parts) == 3:
+        h, m, s = parts
+    elif len(parts) == 2:
+        h, m, s = parts[0], parts[1], 0
+    else:
+        h, m, s = 0, parts[0], 0
+    return days * 1440 + h * 60 + m + (1 if s else 0)
+
+
+class Cache:
+    """Tiny JSON file cache: key -> (stored at, value), expired by TTL on read."""
+
+    def __init__(self, path: Optional[str] = CACHE_PATH):
+        self.path = path
+        self.data: Dict[str, list] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                self.data = {}
+
+    def get(self, key: str, ttl: float):
+        entry = self.data.get(key)
+        if entry and time.time() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    def put(self, key: str, value) -> None:
+        self.data[key] = [time.time(), value]
+        if not self.path:
+            return
+        now = time.time()
+        # drop anything too old to be useful to any TTL
+        self.data = {k: v for k, v in self.data.items() if now - v[0] < max(TEST_ONLY_TTL, HISTORY_TTL)}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump(self.data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def test_only_wait(execute: Execute, partition: str, walltime: str, cpus: int) -> Optional[float]:
+    """Seconds until slurmctld would start this job now, from sbatch --test-only."""
+    # date first, so the wait is measured on the cluster's clock
+    out, err = execute(f"date +{SLURM_TIME}; sbatch --test-only -p {partition} -t {walltime} "
+                       f"-c {cpus} --wrap true")
+    m = re.search(r"to start at (\S+)", err + out)
+    if not m or not out.strip():
+        return None
+    try:
+        now = datetime.strptime(out.split()[0], SLURM_TIME)
+        start = datetime.strptime(m.group(1), SLURM_TIME)
+    except ValueError:
+        return None
+    return max((start - now).total_seconds(), 0.0)
+
+
+def history_waits(execute: Execute, partition: str) -> List[Tuple[int, int, float]]:
+    """(time limit minutes, CPUs, wait seconds) for recent jobs that started."""
+    out, _ = execute(f"sacct -a -X -n -P -S {HISTORY_WINDOW} -r {partition} "
+                     f"-o Submit,Start,TimelimitRaw,AllocCPUS")
+    rows = []
+    for line in out.splitlines():
+        fields = line.split("|")
+        if len(fields) < 4:
+            continue
+        try:
+            submit = datetime.strptime(fields[0], SLURM_TIME)
+            start = datetime.strptime(fields[1], SLURM_TIME)
+            rows.append((int(fields[2]), int(fields[3]), (start - submit).total_seconds()))
+        except ValueError:
+            # Start=Unknown (still pending), Timelimit=Partition_Limit, ...
+            continue
+    return rows
+
+
+def similar_waits(rows: List[Tuple[int, int, float]], minutes: int, cpus: int) -> List[float]:
+    """Waits of jobs within a factor of two in time limit and CPUs, else all of them."""
+    similar = [w for lim, c, w in rows
+               if minutes / 2 <= lim <= minutes * 2 and cpus / 2 <= max(c, 1) <= cpus * 2]
+    if len(similar) >= MIN_SIMILAR:
+        return similar
+    return [w for _, _, w in rows]
+
+
+def predict(execute: Execute, candidates: List[Tuple[str, str]], cpus: int = 1,
+            cache: Optional[Cache] = None) -> List[dict]:
+    """Expected wait for each (partition, walltime), lowest first.
+
+    expected_wait is the mean of the --test-only estimate and the
+    historical median when both exist, otherwise whichever does.
+    Candidates with neither are kept last with expected_wait None.
+    """
+    cache = cache or Cache()
+    rows_by_partition: Dict[str, List[Tuple[int, int, float]]] = {}
+    results = []
+    for order, (partition, walltime) in enumerate(candidates):
+        key = f"test:{partition}:{walltime}:{cpus}"
+        test_only = cache.get(key, TEST_ONLY_TTL)
+        if test_only is None:
+            test_only = test_only_wait(execute, partition, walltime, cpus)
+            cache.put(key, test_only)
+
+        key = f"hist:{partition}:{walltime}:{cpus}"
+        hist = cache.get(key, HISTORY_TTL)
+        if hist is None:
+            # one sacct per partition however many walltimes are compared
+            if partition not in rows_by_partition:
+                rows_by_partition[partition] = history_waits(execute, partition)
+            waits = similar_waits(rows_by_partition[partition], walltime_minutes(walltime), cpus)
+            median = statistics.median(waits) if waits else None
+            p90 = statistics.quantiles(waits, n=10)[-1] if len(waits) >= 2 else median
+            hist = [median, p90, len(waits)]
+            cache.put(key, hist)
+        median, p90, samples = hist
+
+        signals = [s for s in (test_only, median) if s is not None]
+        results.append({
+            "partition": partition,
+            "walltime": walltime,
+            "test_only_wait": test_only,
+            "history_median_wait": median,
+            "history_p90_wait": p90,
+            "history_samples": samples,
+            "expected_wait": sum(signals) / len(signals) if signals else None,
+            "order": order,
+        })
+    # unknowns last; ties keep the caller's preference order
+    results.sort(key=lambda r: (r["expected_wait"] is None, r["expected_wait"] or 0, r["order"]))
+    return results
+
+
+def best_option(execute: Execute, candidates: List[Tuple[str, str]], cpus: int = 1,
+                cache: Optional[Cache] = None) -> Tuple[str, str]:
+    """(partition, walltime) with the lowest expected wait; first candidate if nothing is known."""
+    best = predict(execute, candidates, cpus, cache)[0]
+    return best["partition"], best["walltime"]
+
+
+def format_wait(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def print_predictions(results: List[dict]) -> None:
+    print(f"{'partition':<20} {'walltime':<12} {'expected':>9} {'test-only':>10} "
+          f"{'hist p50':>9} {'hist p90':>9} {'samples':>8}")
+    for r in results:
+        print(f"{r['partition']:<20} {r['walltime']:<12} {format_wait(r['expected_wait']):>9} "
+              f"{format_wait(r['test_only_wait']):>10} {format_wait(r['history_median_wait']):>9} "
+              f"{format_wait(r['history_p90_wait']):>9} {r['history_samples']:>8}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Predict queue wait for candidate partitions/walltimes.")
+    p.add_argument("-c", "--candidate", action="append", dest="candidates", required=True,
+                   metavar="PARTITION=WALLTIME", help="candidate to compare; repeat for several")
+    p.add_argument("--cpus", type=int, default=1, help="CPUs per task (default 1)")
+    p.add_argument("--no-cache", action="store_true", help="ignore and do not write the cache")
+    p.add_argument("--json", action="store_true", help="print predictions as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    candidates = []
+    for c in args.candidates:
+        partition, _, walltime = c.partition("=")
+        candidates.append((partition, walltime or "03:00:00"))
+    cache = Cache(None if args.no_cache else CACHE_PATH)
+    results = predict(local_execute, candidates, args.cpus, cache)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_predictions(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Purpose: benchmark sacct ingestion paths against fake_sacct.py
+#   Each path runs in a fresh interpreter with a fake `sacct` first on PATH,
+#   so peak RSS is per path and not polluted by earlier runs. Each distinct
+#   sacct query is generated once (untimed) and replayed from a cache, so
+#   the timings measure our parsing, not the generator.
+#
+# Usage: ./sacct_bench.py [--jobs 1000000] [--repeat 3] [--path NAME ...]
+# Example: ./sacct_bench.py --jobs 5000000 --path sacct_user_partition --path iter_sacct_jobs+summarize
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from sacct_reports import FIELDS, iter_sacct_jobs, sacct_extra, sacct_jobs, summarize  # noqa: E402
+from users_c7_public_partitions import END, START, sacct_cmd, sacct_user_partition  # noqa: E402
+
+
+def count(rows) -> int:
+    n = 0
+    for _ in rows:
+        n += 1
+    return n
+
+
+def summary_jobs(summary: dict) -> int:
+    return summary["all"]["jobs"]
+
+
+USER_PARTITION = sacct_cmd(START, END, ["User", "Partition"])
+JOBS = sacct_cmd(START, END, FIELDS, sacct_extra())
+
+# name -> (sacct command it issues, callable returning the records it produced)
+PATHS: Dict[str, Tuple[List[str], Callable[[], int]]] = {
+    "sacct_user_partition": (USER_PARTITION, lambda: len(sacct_user_partition(START, END))),
+    "sacct_jobs": (JOBS, lambda: len(sacct_jobs(START, END))),
+    "iter_sacct_jobs": (JOBS, lambda: count(iter_sacct_jobs(START, END))),
+    "sacct_jobs+summarize": (JOBS, lambda: summary_jobs(summarize(sacct_jobs(START, END)))),
+    "iter_sacct_jobs+summarize": (JOBS, lambda: summary_jobs(summarize(iter_sacct_jobs(START, END)))),
+}
+
+
+def worker(name: str) -> None:
+    """Run one path in this process and print its measurements as JSON."""
+    t0 = time.perf_counter()
+    records = PATHS[name][1]()
+    seconds = time.perf_counter() - t0
+    # ru_maxrss is KiB on Linux
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"records": records, "seconds": seconds, "maxrss_kb": maxrss}))
+
+
+def fake_bin(tmp: str) -> str:
+    bindir = os.path.join(tmp, "bin")
+    os.makedirs(bindir, exist_ok=True)
+    os.symlink(os.path.join(HERE, "fake_sacct.py"), os.path.join(bindir, "sacct"))
+    return bindir
+
+
+def sacct_lines(cmd: List[str], env: Dict[str, str]) -> int:
+    """Rows the fake sacct prints for cmd; also fills its replay cache."""
+    out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE)
+    return out.stdout.count(b"\n")
+
+
+def run_path(name: str, env: Dict[str, str]) -> dict:
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name],
+                         env=env, check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(out.stdout)
+
+
+def baseline_rss(env: Dict[str, str]) -> int:
+    """Peak RSS of an interpreter that only imports the modules under test."""
+    code = ("import resource, sys; sys.path.insert(0, %r); import sacct_reports; "
+            "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)" % HERE)
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                         stdout=subprocess.PIPE, text=True)
+    return int(out.stdout)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark sacct ingestion paths on synthetic data.")
+    p.add_argument("--jobs", type=int, default=1000000, help="top-level jobs to generate (default 1000000)")
+    p.add_argument("--users", type=int, default=5000, help="distinct users (default 5000)")
+    p.add_argument("--repeat", type=int, default=3, help="timed runs per path; best is reported (default 3)")
+    p.add_argument("--path", action="append", dest="paths", choices=sorted(PATHS),
+                   help="ingestion path to run; repeat for several (default: all)")
+    p.add_argument("--cache", help="keep generated sacct output here between benchmark runs")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    p.add_argument("--worker", help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.worker:
+        worker(args.worker)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="sacct_bench.") as tmp:
+        env = dict(os.environ)
+        env["PATH"] = fake_bin(tmp) + os.pathsep + env.get("PATH", "")
+        env["FAKE_SACCT_JOBS"] = str(args.jobs)
+        env["FAKE_SACCT_USERS"] = str(args.users)
+        env["FAKE_SACCT_CACHE"] = args.cache or os.path.join(tmp, "cache")
+
+        base = baseline_rss(env)
+        lines: Dict[str, int] = {}
+        results = []
+        for name in args.paths or list(PATHS):
+            cmd = PATHS[name][0]
+            key = " ".join(cmd)
+            if key not in lines:
+                print(f"Generating {args.jobs} jobs for: {key}", file=sys.stderr)
+                t0 = time.perf_counter()
+                lines[key] = sacct_lines(cmd, env)
+                print(f"  {lines[key]} sacct rows in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+            rows = lines[key]
+            runs = [run_path(name, env) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            results.append({
+                "path": name,
+                "sacct_rows": rows,
+                "records": best["records"],
+                "seconds": round(best["seconds"], 3),
+                "rows_per_s": round(rows / best["seconds"]) if best["seconds"] else None,
+                "peak_rss_mb": round(max(r["maxrss_kb"] for r in runs) / 1024, 1),
+                "over_baseline_mb": round((max(r["maxrss_kb"] for r in runs) - base) / 1024, 1),
+            })
+
+    if args.json:
+        json.dump({"jobs": args.jobs, "baseline_rss_mb": round(base / 1024, 1),
+                   "results": results}, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"# {args.jobs} jobs, interpreter baseline {base / 1024:.1f} MB")
+    print(f"{'path':<28} {'sacct rows':>10} {'records':>10} {'seconds':>9} {'rows/s':>12} "
+          f"{'peak MB':>9} {'+base MB':>9}")
+    for r in results:
+        print(f"{r['path']:<28} {r['sacct_rows']:>10} {r['records']:>10} {r['seconds']:>9.3f} "
+              f"{r['rows_per_s']:>12,} "
+              f"{r['peak_rss_mb']:>9.1f} {r['over_baseline_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# Purpose: long-running Slurm accounting exporter
+#   Polls sacct incrementally (only jobs active since the previous poll),
+#   keeps a rolling window of top-level jobs in memory and serves
+#   per-partition aggregates on a local HTTP endpoint:
+#     /metrics       Prometheus text format
+#     /metrics.json  same numbers as JSON
+#
+# Usage: ./sacct_exporter.py [--interval 60] [--window-hours 24] [--port 9807]
+# Example: ./sacct_exporter.py -p mit_preemptable -p mit_normal --window-hours 168
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+from sacct_reports import SACCT_TIME, Job, parse_time, preemption_rate, sacct_jobs, summarize
+
+
+def log(msg: str) -> None:
+    print(f"{datetime.now().strftime(SACCT_TIME)} {msg}", file=sys.stderr, flush=True)
+
+
+class JobWindow:
+    """Top-level jobs seen within the last `window`, keyed by JobID.
+
+    A re-polled job replaces its earlier record, so state changes
+    (PENDING -> RUNNING -> PREEMPTED) are picked up without rescanning.
+    """
+
+    def __init__(self, window: timedelta, partitions: Optional[List[str]] = None):
+        self.window = window
+        self.partitions = partitions
+        self.jobs: Dict[str, Job] = {}
+
+    def update(self, jobs: Iterable[Job]) -> int:
+        n = 0
+        for job in jobs:
+            self.jobs[job.jobid] = job
+            n += 1
+        return n
+
+    def prune(self, now: datetime) -> int:
+        cutoff = now - self.window
+        stale = []
+        for jobid, job in self.jobs.items():
+            end = parse_time(job.end)
+            # no End yet means pending or still running: keep it
+            if end is not None and end < cutoff:
+                stale.append(jobid)
+        for jobid in stale:
+            del self.jobs[jobid]
+        return len(stale)
+
+    def metrics(self, now: datetime) -> dict:
+        summary = summarize(self.jobs.values(), self.partitions)
+        hours = self.window.total_seconds() / 3600
+        cutoff = now - self.window
+        submitted: Dict[str, int] = {}
+        for job in self.jobs.values():
+            submit = parse_time(job.submit)
+            if submit is None or submit < cutoff:
+                continue
+            for part in job.partition.split(","):
+                if part in summary["partitions"]:
+                    submitted[part] = submitted.get(part, 0) + 1
+        parts = {}
+        for part, s in sorted(summary["partitions"].items()):
+            parts[part] = {
+                "active_users": len(s["users"]),
+                "jobs": s["jobs"],
+                "preempted": s["preempted"],
+                "preemption_rate": round(preemption_rate(s["preempted"], s["jobs"]), 2),
+                "jobs_per_hour": round(submitted.get(part, 0) / hours, 3),
+            }
+        return {"window_hours": hours, "tracked_jobs": len(self.jobs), "partitions": parts}
+
+
+class Exporter:
+    """Background poller plus the latest metrics snapshot it produced."""
+
+    def __init__(self, window: JobWindow, interval: int, overlap: int):
+        self.window = window
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap)
+        self.last_poll: Optional[datetime] = None
+        self.lock = threading.Lock()
+        self.snapshot: dict = {}
+        self.stop = threading.Event()
+
+    def poll(self) -> None:
+        now = datetime.now()
+        if self.last_poll is None:
+            # first poll backfills the whole window
+            since = now - self.window.window
+        else:
+            # overlap covers records slurmdbd had not committed last time
+            since = self.last_poll - self.overlap
+        t0 = time.monotonic()
+        jobs = sacct_jobs(since.strftime(SACCT_TIME), now.strftime(SACCT_TIME),
+                          self.window.partitions)
+        elapsed = time.monotonic() - t0
+        seen = self.window.update(jobs)
+        pruned = self.window.prune(now)
+        snapshot = self.window.metrics(now)
+        snapshot["last_poll"] = now.strftime(SACCT_TIME)
+        snapshot["last_poll_timestamp"] = now.timestamp()
+        snapshot["poll_seconds"] = round(elapsed, 3)
+        with self.lock:
+            self.snapshot = snapshot
+        self.last_poll = now
+        log(f"polled {seen} job(s) since {since.strftime(SACCT_TIME)} in {elapsed:.2f}s, "
+            f"pruned {pruned}, tracking {snapshot['tracked_jobs']}")
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            try:
+                self.poll()
+            except (subprocess.CalledProcessError, OSError) as e:
+                # keep serving the previous snapshot and try again next interval
+                log(f"sacct poll failed: {e}")
+            self.stop.wait(self.interval)
+
+    def get_snapshot(self) -> dict:
+        with self.lock:
+            return self.snapshot
+
+
+def prometheus_text(snapshot: dict) -> str:
+    lines = []
+
+    def metric(name: str, help_text: str, kind: str = "gauge"):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    if not snapshot:
+        return ""
+    metric("sacct_last_poll_timestamp_seconds", "Unix time of the last successful sacct poll.")
+    lines.append(f"sacct_last_poll_timestamp_seconds {snapshot['last_poll_timestamp']:.0f}")
+    metric("sacct_poll_duration_seconds", "Wall time of the last sacct poll.")
+    lines.append(f"sacct_poll_duration_seconds {snapshot['poll_seconds']}")
+    metric("sacct_tracked_jobs", "Top-level jobs held in the rolling window.")
+    lines.append(f"sacct_tracked_jobs {snapshot['tracked_jobs']}")
+
+    per_part = [
+        ("sacct_active_users", "active_users", "Distinct users with jobs in the window."),
+        ("sacct_jobs", "jobs", "Top-level jobs in the window."),
+        ("sacct_preempted_jobs", "preempted", "Preempted top-level jobs in the window."),
+        ("sacct_preemption_rate_percent", "preemption_rate", "Preempted / total jobs, percent."),
+        ("sacct_jobs_per_hour", "jobs_per_hour", "Jobs submitted per hour over the window."),
+    ]
+    for name, key, help_text in per_part:
+        metric(name, help_text)
+        for part, r in snapshot["partitions"].items():
+            lines.append(f'{name}{{partition="{part}"}} {r[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def make_handler(exporter: Exporter):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            snapshot = exporter.get_snapshot()
+            if self.path == "/metrics":
+                body = prometheus_text(snapshot).encode()
+                ctype = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = json.dumps(snapshot, indent=2).encode()
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # scrapes every few seconds would drown the poll log
+            pass
+
+    return Handler
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Incremental Slurm accounting metrics exporter.")
+    p.add_argument("-p", "--partition", action="append", dest="partitions",
+                   help="partition to export; repeat for several (default: all)")
+    p.add_argument("--interval", type=int, default=60, help="seconds between polls (default 60)")
+    p.add_argument("--overlap", type=int, default=120,
+                   help="seconds each poll re-reads before the previous one (default 120)")
+    p.add_argument("--window-hours", type=float, default=24,
+                   help="rolling window for aggregates (default 24)")
+    p.add_argument("--bind", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    p.add_argument("--port", type=int, default=9807, help="port to listen on (default 9807)")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    # verify sacct exists
+    if shutil.which("sacct") is None:
+        sys.stderr.write("Error: sacct not found on PATH.\n")
+        sys.exit(1)
+
+    window = JobWindow(timedelta(hours=args.window_hours), args.partitions)
+    exporter = Exporter(window, args.interval, args.overlap)
+    poller = threading.Thread(target=exporter.run, daemon=True)
+    poller.start()
+
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(exporter))
+    log(f"serving metrics on http://{args.bind}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("shutting down")
+    finally:
+        exporter.stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# Purpose: run the sacct_reports.py reports across several Slurm clusters
+#   Every cluster is queried at the same time, each from its own thread,
+#   either through the local slurmdbd with `sacct -M NAME` or by running
+#   sacct on one of that cluster's hosts over SSH. Rows are merged as they
+#   arrive and tagged with the cluster name, so wall time is that of the
+#   slowest cluster rather than the sum.
+#
+# Cluster specs:
+#   NAME            local sacct -M NAME
+#   NAME=HOST       ssh HOST sacct ...   (HOST may be user@host)
+#
+# Usage: ./sacct_federation.py -C SPEC [-C SPEC ...] [-S START] [-E END] [-p PARTITION ...] [--json]
+# Example: ./sacct_federation.py -C engaging -C satori=satori-login-001.mit.edu -S 2025-04-01
+import queue
+import shlex
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sacct_reports import (
+    FIELDS, Job, build_parser, is_step, output, report_dict, sacct_extra, summarize,
+)
+from users_c7_public_partitions import run_lines, sacct_cmd
+
+SSH = "ssh -o BatchMode=yes -o ConnectTimeout=10"
+# rows handed from a reader thread to the merger at a time
+BATCH = 1000
+
+
+def parse_spec(spec: str) -> Tuple[str, Optional[str]]:
+    """'NAME' -> (NAME, None); 'NAME=HOST' -> (NAME, HOST)."""
+    name, _, host = spec.partition("=")
+    return name, host or None
+
+
+def cluster_cmd(name: str, host: Optional[str], start: str, end: str,
+                partitions: Optional[List[str]] = None, ssh: str = SSH) -> List[str]:
+    if host is None:
+        return sacct_cmd(start, end, FIELDS, sacct_extra(partitions) + ["-M", name])
+    remote = sacct_cmd(start, end, FIELDS, sacct_extra(partitions))
+    return shlex.split(ssh) + [host, shlex.join(remote)]
+
+
+def read_cluster(name: str, cmd: List[str], out: "queue.Queue") -> None:
+    """Thread body: stream one cluster's rows into out as tagged Job batches.
+
+    Ends with (name, None, error-or-None, seconds) so the merger knows this
+    cluster is done and how it went.
+    """
+    t0 = time.monotonic()
+    error = None
+    n = len(FIELDS)
+    batch: List[Job] = []
+    try:
+        for line in run_lines(cmd):
+            values = line.rstrip("\n").split("|")
+            if len(values) < n or not values[0] or is_step(values[0]):
+                continue
+            # the spec name wins over whatever the Cluster column says
+            batch.append(Job(*[v.strip() for v in values[:n]])._replace(cluster=name))
+            if len(batch) >= BATCH:
+                out.put((name, batch, None, None))
+                batch = []
+        if batch:
+            out.put((name, batch, None, None))
+    except Exception as e:  # CalledProcessError, OSError, ...: report, don't kill the merge
+        error = str(e)
+    out.put((name, None, error, time.monotonic() - t0))
+
+
+def federated_jobs(specs: List[str], start: str, end: str,
+                   partitions: Optional[List[str]] = None, ssh: str = SSH,
+                   status: Optional[Dict[str, dict]] = None) -> Iterator[Job]:
+    """Yield top-level jobs from every cluster in specs as they arrive.
+
+    status, if given, is filled with {cluster: {"jobs", "seconds", "error"}}.
+    """
+    out: "queue.Queue" = queue.Queue(maxsize=64)
+    threads = []
+    for spec in specs:
+        name, host = parse_spec(spec)
+        cmd = cluster_cmd(name, host, start, end, partitions, ssh)
+        t = threading.Thread(target=read_cluster, args=(name, cmd, out), daemon=True)
+        t.start()
+        threads.append(t)
+        if status is not None:
+            status[name] = {"jobs": 0, "seconds": None, "error": None}
+
+    running = len(threads)
+    while running:
+        name, batch, error, seconds = out.get()
+        if batch is None:
+            running -= 1
+            if status is not None:
+                status[name]["seconds"] = round(seconds, 3)
+                status[name]["error"] = error
+            continue
+        if status is not None:
+            status[name]["jobs"] += len(batch)
+        yield from batch
+
+
+def by_cluster(jobs: Iterator[Job]) -> Iterator[Job]:
+    """Prefix partitions with their cluster so same-named partitions stay apart."""
+    for job in jobs:
+        parts = ",".join(f"{job.cluster}/{p}" for p in job.partition.split(",") if p)
+        yield job._replace(partition=parts)
+
+
+def main(argv: Optional[List[str]] = None):
+    p = build_parser("Slurm accounting reports across several clusters.")
+    p.add_argument("-C", "--cluster", action="append", dest="clusters", required=True,
+                   metavar="SPEC", help="NAME (sacct -M NAME) or NAME=HOST (sacct over ssh); repeat")
+    p.add_argument("--ssh", default=SSH, help=f"ssh command for NAME=HOST specs (default: {SSH})")
+    p.add_argument("--merge-partitions", action="store_true",
+                   help="pool same-named partitions across clusters instead of CLUSTER/PARTITION")
+    args = p.parse_args(argv)
+    if args.from_sketches or args.sketch_dir:
+        p.error("sketch options are not supported across clusters; use sacct_reports.py per cluster")
+
+    status: Dict[str, dict] = {}
+    jobs = federated_jobs(args.clusters, args.start, args.end, args.partitions, args.ssh, status)
+    if not args.merge_partitions:
+        jobs = by_cluster(jobs)
+    # partitions were already filtered by sacct on every cluster
+    summary = summarize(jobs, None, args.approx)
+
+    report = report_dict(summary, args.start, args.end)
+    report["clusters"] = status
+    failed = {name: s["error"] for name, s in status.items() if s["error"]}
+    for name, error in failed.items():
+        sys.stderr.write(f"Warning: cluster {name} failed, report is partial: {error}\n")
+    output(report, args)
+    if not args.json:
+        print()
+        for name, s in status.items():
+            outcome = f"failed: {s['error']}" if s["error"] else "ok"
+            print(f"Cluster '{name}': {s['jobs']} jobs in {s['seconds']}s ({outcome})")
+    if failed and len(failed) == len(status):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# Purpose: how much compute does preemption throw away?
+#   preempt_stats.sh gives the share of preempted jobs; this gives the
+#   core-hours lost. Every attempt of every job is read (sacct -D), so a
+#   job preempted twice and then requeued to completion counts both lost
+#   attempts. Each PREEMPTED attempt's (End - Start) * AllocCPUS is counted
+#   as wasted -- jobs that checkpoint lose less, so treat it as an upper
+#   bound. Used and lost core-hours alike are clipped to the window.
+#   Totals are broken down per user, per partition and per day (the day
+#   the attempt was preempted), with requeue-chain statistics.
+#   Only attempts that ended in the window count, in the totals and in the
+#   requeue chains; ones still running (or otherwise unfinished) at its end
+#   are left out until they finish. REQUEUED attempts have ended (the job
+#   went back to the queue) and count as used.
+#   All arithmetic is numpy over the whole window.
+#
+# Usage: ./sacct_lost_work.py [-S START] [-E END] [-p PARTITION ...] [--top N] [--json] [FILE ...]
+# Example: ./sacct_lost_work.py -S 2025-01-01 -E 2025-06-30 --top 20
+import argparse
+import json
+import shutil
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from sacct_occupancy import to_seconds
+from sacct_offline import iter_file_jobs
+from sacct_reports import Job, is_preempted, iter_sacct_jobs, parse_when
+from users_c7_public_partitions import START, END
+
+PARTITION = "mit_preemptable"
+# attempts in these states have not ended, whatever End says
+UNFINISHED = {"PENDING", "RUNNING", "SUSPENDED", "COMPLETING", "CONFIGURING", "RESIZING", "SIGNALING",
+              "STAGE_OUT"}
+
+
+def columns(jobs: Iterable[Job], partitions: List[str]) -> Dict[str, list]:
+    """Column lists for every started attempt in the given partitions."""
+    wanted = set(partitions)
+    cols: Dict[str, list] = {k: [] for k in ("jobid", "user", "partition", "start", "end", "cpus", "preempted",
+                                             "finished")}
+    for job in jobs:
+        if not job.start[:1].isdigit():
+            continue
+        part = job.partition.split(",")[0]
+        if part not in wanted:
+            continue
+        cols["jobid"].append(job.jobid)
+        cols["user"].append(job.user)
+        cols["partition"].append(part)
+        cols["start"].append(job.start)
+        cols["end"].append(job.end)
+        cols["cpus"].append(job.alloccpus)
+        cols["preempted"].append(is_preempted(job.state))
+        # "CANCELLED by 123" -> CANCELLED
+        cols["finished"].append(job.state.split(" ")[0] not in UNFINISHED)
+    return cols
+
+
+def group_sum(keys: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    if not len(keys):
+        return {}
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(uniq))
+    return {str(k): float(v) for k, v in zip(uniq, sums)}
+
+
+def lost_work(cols: Dict[str, list], w0: int, w1: int) -> dict:
+    """Wasted core-hours, vectorized over all attempts."""
+    starts, _ = to_seconds(cols["start"])
+    ends, running = to_seconds(cols["end"])
+    cpus = np.array([int(c) if c.isdigit() else 0 for c in cols["cpus"]], dtype=np.int64)
+    preempted = np.array(cols["preempted"], dtype=bool)
+    finished = np.array(cols["finished"], dtype=bool) & ~running
+    users = np.array(cols["user"])
+    parts = np.array(cols["partition"])
+    jobids = np.array(cols["jobid"])
+
+    # attempts that ended inside the window; core-hours from the window start on
+    inside = finished & (ends >= w0) & (ends <= w1)
+    core_hours = np.maximum(ends - np.maximum(starts, w0), 0) * cpus / 3600.0
+    lost = np.where(preempted & inside, core_hours, 0.0)
+    used = np.where(inside, core_hours, 0.0)
+
+    mask = preempted & inside
+    day = (ends // 86400).astype("datetime64[D]").astype(str)
+
+    total_used = float(used.sum())
+    total_lost = float(lost.sum())
+    by_part_used = group_sum(parts[inside], used[inside])
+    by_part_lost = group_sum(parts[mask], lost[mask])
+
+    # requeue chains: attempts per JobID among the attempts that ended in the window
+    chain = {}
+    if inside.any():
+        uniq, inverse, counts = np.unique(jobids[inside], return_inverse=True, return_counts=True)
+        was_preempted = preempted[inside]
+        # a job's last attempt is its latest start
+        order = np.lexsort((starts[inside], inverse))
+        last = order[np.r_[inverse[order][1:] != inverse[order][:-1], True]]
+        touched = np.bincount(inverse, weights=was_preempted.astype(float), minlength=len(uniq)) > 0
+        requeued = counts > 1
+        chain = {
+            "jobs": int(len(uniq)),
+            "jobs_preempted": int(touched.sum()),
+            "jobs_requeued": int(requeued.sum()),
+            "max_attempts": int(counts.max()),
+            "mean_attempts_when_requeued": round(float(counts[requeued].mean()), 2) if requeued.any() else 0.0,
+            # preempted at least once but the last attempt is still PREEMPTED
+            "jobs_never_finished": int((touched & was_preempted[last]).sum()),
+        }
+
+    return {
+        "attempts": int(inside.sum()),
+        "preempted_attempts": int(mask.sum()),
+        "core_hours_used": round(total_used, 1),
+        "core_hours_lost": round(total_lost, 1),
+        "lost_fraction": round(total_lost / total_used * 100, 2) if total_used else 0.0,
+        "partitions": {
+            p: {
+                "core_hours_used": round(by_part_used.get(p, 0.0), 1),
+                "core_hours_lost": round(v, 1),
+                "lost_fraction": round(v / by_part_used[p] * 100, 2) if by_part_used.get(p) else 0.0,
+            }
+            for p, v in sorted(by_part_lost.items())
+        },
+        "users": {u: round(v, 1) for u, v in sorted(group_sum(users[mask], lost[mask]).items(),
+                                                     key=lambda kv: -kv[1])},
+        "days": {d: round(v, 1) for d, v in sorted(group_sum(day[mask], lost[mask]).items())},
+        "requeue": chain,
+    }
+
+
+def print_text(report: dict, top: int) -> None:
+    print("# Time window:", report["start"], "to", report["end"])
+    print("# Partitions:", ", ".join(report["partition_filter"]))
+    print()
+    print(f"Attempts ended in window: {report['attempts']}")
+    print(f"Preempted attempts: {report['preempted_attempts']}")
+    print(f"Core-hours used: {report['core_hours_used']:,.1f}")
+    print(f"Core-hours lost to preemption: {report['core_hours_lost']:,.1f} ({report['lost_fraction']:.2f}%)")
+    r = report["requeue"]
+    if r:
+        print(f"Jobs preempted at least once: {r['jobs_preempted']} of {r['jobs']}")
+        print(f"Jobs requeued: {r['jobs_requeued']} (mean {r['mean_attempts_when_requeued']} attempts, "
+              f"max {r['max_attempts']})")
+        print(f"Preempted jobs whose last attempt was preempted: {r['jobs_never_finished']}")
+    print()
+    print("Per partition:")
+    for part, p in report["partitions"].items():
+        print(f"  {part:<24} {p['core_hours_lost']:>14,.1f} lost of {p['core_hours_used']:>14,.1f} "
+              f"({p['lost_fraction']:.2f}%)")
+    print()
+    print(f"Top {top} users by core-hours lost:")
+    for user, v in list(report["users"].items())[:top]:
+        print(f"  {user:<24} {v:>14,.1f}")
+    print()
+    print("Per day:")
+    for day, v in report["days"].items():
+        print(f"  {day}  {v:>14,.1f}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Core-hours lost to preemption.")
+    p.add_argument("files", nargs="*", metavar="FILE",
+                   help="sacct -D dump or jobcomp log to read instead of calling sacct")
+    p.add_argument("-S", "--start", default=START, help=f"window start (default {START})")
+    p.add_argument("-E", "--end", default=END, help=f"window end (default {END})")
+    p.add_argument("-p", "--partition", action="append", dest="partitions",
+                   help=f"partition to account; repeat for several (default {PARTITION})")
+    p.add_argument("--top", type=int, default=10, help="users to list in the text report (default 10)")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    partitions = args.partitions or [PARTITION]
+    now = datetime.now()
+    start, end = parse_when(args.start, now), parse_when(args.end, now)
+    if start is None or end is None or end <= start:
+        sys.stderr.write("Error: need a window with -S before -E "
+                         "(YYYY-MM-DD[THH:MM[:SS]], now, now-Ndays).\n")
+        sys.exit(1)
+
+    if args.files:
+        jobs = (j for path in args.files for j in iter_file_jobs(path))
+    else:
+        # verify sacct exists
+        if shutil.which("sacct") is None:
+            sys.stderr.write("Error: sacct not found on PATH.\n")
+            sys.exit(1)
+        jobs = iter_sacct_jobs(args.start, args.end, partitions, duplicates=True)
+
+    w0 = int(np.datetime64(start, "s").astype(np.int64))
+    w1 = int(np.datetime64(end, "s").astype(np.int64))
+    report = {"start": args.start, "end": args.end, "partition_filter": partitions}
+    report.update(lost_work(columns(jobs, partitions), w0, w1))
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_text(report, args.top)
+
+
+if __name__ == "__main__":
+    main()
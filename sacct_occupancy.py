@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# Purpose: when are partitions busy?
+#   Concurrent allocated CPUs per partition over time, from job
+#   Start/End/AllocCPUS intervals, computed with a sweep line over the
+#   sorted interval endpoints (O(n log n), numpy) rather than per-minute
+#   buckets. Reports peak and time-weighted percentile occupancy and an
+#   hour-of-week heatmap (mean and peak CPUs, Monday..Sunday x 00..23) --
+#   i.e. when it is quiet enough to start a Jupyter session.
+#
+#   Jobs come from live sacct, or from archived sacct dumps / jobcomp logs
+#   (see sacct_offline.py) when files are given.
+#
+# Usage: ./sacct_occupancy.py [-S START] [-E END] [-p PARTITION ...] [--percent] [--json] [FILE ...]
+# Example: ./sacct_occupancy.py -S now-28days -p mit_normal --percent
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sacct_offline import iter_file_jobs
+from sacct_reports import Job, iter_sacct_jobs, parse_when
+from users_c7_public_partitions import START, END, run
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+PERCENTILES = [50, 90, 95, 99]
+
+
+def to_seconds(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """sacct timestamps -> int64 seconds (naive local time); Unknown/None -> NaT."""
+    arr = np.array([v if v[:1].isdigit() else "NaT" for v in values], dtype="datetime64[s]")
+    return arr.astype(np.int64), np.isnat(arr)
+
+
+def collect(jobs: Iterable[Job], partitions: Optional[List[str]] = None) -> Dict[str, Tuple[list, list, list]]:
+    """Group (start, end, cpus) strings by partition; jobs that never started are dropped."""
+    wanted = set(partitions) if partitions else None
+    by_part: Dict[str, Tuple[list, list, list]] = {}
+    for job in jobs:
+        if not job.start[:1].isdigit():
+            continue
+        for part in job.partition.split(","):
+            if not part or (wanted is not None and part not in wanted):
+                continue
+            cols = by_part.get(part)
+            if cols is None:
+                cols = by_part[part] = ([], [], [])
+            cols[0].append(job.start)
+            cols[1].append(job.end)
+            cols[2].append(job.alloccpus)
+    return by_part
+
+
+def intervals(cols: Tuple[list, list, list], w0: int, w1: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Clip job intervals to [w0, w1]; still-running jobs (End Unknown) run to w1."""
+    starts, _ = to_seconds(cols[0])
+    ends, running = to_seconds(cols[1])
+    ends[running] = w1
+    cpus = np.array([int(c) if c.isdigit() else 0 for c in cols[2]], dtype=np.int64)
+    starts = np.maximum(starts, w0)
+    ends = np.minimum(ends, w1)
+    keep = (ends > starts) & (cpus > 0)
+    return starts[keep], ends[keep], cpus[keep]
+
+
+def sweep(starts: np.ndarray, ends: np.ndarray, cpus: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concurrent CPUs as a step function: levels[i] holds on [times[i], times[i+1])."""
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([cpus, -cpus])
+    order = np.lexsort((deltas, times))
+    times = times[order]
+    levels = np.cumsum(deltas[order])
+    # several events at one instant: only the level after the last counts
+    last = np.r_[times[1:] != times[:-1], True]
+    return times[last], levels[last]
+
+
+def weighted_percentiles(levels: np.ndarray, weights: np.ndarray, qs: List[float]) -> List[float]:
+    order = np.argsort(levels)
+    cum = np.cumsum(weights[order])
+    total = cum[-1]
+    idx = np.searchsorted(cum, [q / 100 * total for q in qs], side="left")
+    return [float(levels[order][min(i, len(order) - 1)]) for i in idx]
+
+
+def hour_of_week(hours: np.ndarray) -> np.ndarray:
+    """Hour-start seconds -> 0..167 with Monday 00:00 = 0 (1970-01-01 was a Thursday)."""
+    return ((hours // 86400 + 3) % 7) * 24 + (hours // 3600) % 24
+
+
+def analyze(starts: np.ndarray, ends: np.ndarray, cpus: np.ndarray, w0: int, w1: int) -> dict:
+    result = {"jobs": int(len(starts))}
+    if not len(starts):
+        return result
+    times, levels = sweep(starts, ends, cpus)
+    # idle from the window start to the first event, then the step function to w1
+    T = np.r_[w0, times]
+    L = np.r_[0, levels]
+    D = np.diff(np.r_[T, w1])
+    peak = int(np.argmax(L))
+    result["peak_cpus"] = int(L[peak])
+    result["peak_time"] = str(np.datetime64(int(T[peak]), "s"))
+    result["mean_cpus"] = round(float(np.sum(L * D) / (w1 - w0)), 2)
+    result["percentiles"] = {f"p{q}": v for q, v in zip(PERCENTILES, weighted_percentiles(L, D, PERCENTILES))}
+
+    # whole hours inside the window
+    H = np.arange(-(-w0 // 3600) * 3600, w1 + 1, 3600, dtype=np.int64)
+    if len(H) < 2:
+        return result
+    # running integral of CPUs over time, evaluated at each hour boundary
+    F = np.r_[0, np.cumsum(L * D)]
+    k = np.searchsorted(T, H, side="right") - 1
+    FH = F[k] + L[k] * (H - T[k])
+    hourly_mean = np.diff(FH) / 3600
+    # peak inside each hour: levels from the one in effect at its start up to
+    # (but excluding) the one in effect at the next hour, plus that one if it
+    # began before the boundary. The trailing segment (k[-1] to the end of L)
+    # lies past the last whole hour and is dropped.
+    hourly_peak = np.maximum.reduceat(L, k)[:-1].astype(float)
+    spill = T[k[1:]] < H[1:]
+    hourly_peak[spill] = np.maximum(hourly_peak[spill], L[k[1:]][spill])
+
+    how = hour_of_week(H[:-1])
+    counts = np.bincount(how, minlength=168)
+    mean = np.bincount(how, weights=hourly_mean, minlength=168) / np.maximum(counts, 1)
+    peak_hw = np.zeros(168)
+    np.maximum.at(peak_hw, how, hourly_peak)
+    result["heatmap_mean"] = np.round(mean, 1).reshape(7, 24).tolist()
+    result["heatmap_peak"] = peak_hw.reshape(7, 24).tolist()
+    return result
+
+
+def partition_cpus(partition: str) -> Optional[int]:
+    """Total CPUs in a partition from sinfo's A/I/O/T column."""
+    try:
+        out = run(["sinfo", "-h", "-p", partition, "-o", "%C"])
+        return int(out.splitlines()[0].split("/")[3])
+    except (subprocess.CalledProcessError, OSError, ValueError, IndexError):
+        return None
+
+
+def print_heatmap(title: str, grid: List[List[float]], capacity: Optional[int]) -> None:
+    unit = "% of CPUs" if capacity else "CPUs"
+    print(f"  {title} ({unit}):")
+    print("       " + "".join(f"{h:>6d}" for h in range(24)))
+    for day, row in zip(DAYS, grid):
+        if capacity:
+            row = [v / capacity * 100 for v in row]
+        print(f"  {day:<5}" + "".join(f"{v:>6.0f}" for v in row))
+
+
+def print_text(report: dict) -> None:
+    print("# Time window:", report["start"], "to", report["end"])
+    print()
+    for part, r in report["partitions"].items():
+        cap = r.get("capacity_cpus")
+        print(f"Partition '{part}':")
+        print(f"  Jobs: {r['jobs']}")
+        if "peak_cpus" not in r:
+            print()
+            continue
+        if cap:
+            print(f"  Capacity: {cap} CPUs")
+        print(f"  Peak: {r['peak_cpus']} CPUs at {r['peak_time']}")
+        print(f"  Mean: {r['mean_cpus']} CPUs")
+        print("  Percentiles (time-weighted): "
+              + ", ".join(f"{k}={v:.0f}" for k, v in r["percentiles"].items()))
+        if "heatmap_mean" in r:
+            print_heatmap("Hour-of-week mean", r["heatmap_mean"], cap)
+            print_heatmap("Hour-of-week peak", r["heatmap_peak"], cap)
+        print()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Partition CPU occupancy and hour-of-week heatmaps.")
+    p.add_argument("files", nargs="*", metavar="FILE",
+                   help="sacct dump or jobcomp log to read instead of calling sacct")
+    p.add_argument("-S", "--start", default=START, help=f"window start (default {START})")
+    p.add_argument("-E", "--end", default=END, help=f"window end (default {END})")
+    p.add_argument("-p", "--partition", action="append", dest="partitions",
+                   help="partition to analyze; repeat for several (default: all)")
+    p.add_argument("--percent", action="store_true",
+                   help="show heatmaps as a percentage of partition CPUs (from sinfo)")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    now = datetime.now()
+    start, end = parse_when(args.start, now), parse_when(args.end, now)
+    if start is None or end is None or end <= start:
+        sys.stderr.write("Error: need a window with -S before -E "
+                         "(YYYY-MM-DD[THH:MM[:SS]], now, now-Ndays).\n")
+        sys.exit(1)
+
+    if args.files:
+        # intervals() clips to the window, so no per-job time parsing here
+        jobs = (j for path in args.files for j in iter_file_jobs(path))
+    else:
+        # verify sacct exists
+        if shutil.which("sacct") is None:
+            sys.stderr.write("Error: sacct not found on PATH.\n")
+            sys.exit(1)
+        jobs = iter_sacct_jobs(args.start, args.end, args.partitions)
+
+    w0 = int(np.datetime64(start, "s").astype(np.int64))
+    w1 = int(np.datetime64(end, "s").astype(np.int64))
+    parts = {}
+    for part, cols in sorted(collect(jobs, args.partitions).items()):
+        parts[part] = analyze(*intervals(cols, w0, w1), w0, w1)
+        if args.percent:
+            parts[part]["capacity_cpus"] = partition_cpus(part)
+
+    report = {"start": args.start, "end": args.end, "partitions": parts}
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_text(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Purpose: run the sacct_reports.py reports over archived accounting data
+#   instead of live slurmdbd:
+#     - saved `sacct -p` / `sacct -P` dumps (header line optional)
+#     - Slurm jobcomp/filetxt logs (JobId=... UserId=name(uid) ... lines)
+#   Files are memory-mapped and split into chunks on line boundaries; each
+#   chunk is parsed and summarized in a worker process and the partial
+#   summaries are merged, so nothing but the per-partition user sets (or
+#   sketches) is ever held for the whole archive.
+#
+# Usage: ./sacct_offline.py [-S START] [-E END] [-p PARTITION ...] [--json] [--approx]
+#                           [--workers N] [--sketch-dir DIR] FILE [FILE ...]
+# Example: ./sacct_offline.py -S 2021-01-01 -E 2023-12-31 -p mit_preemptable /archive/jobcomp-*.log
+import math
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from hll import HyperLogLog
+from sacct_reports import (
+    FIELDS, Job, Window, build_parser, day_sketches, in_window, is_step, merge_day_sketches,
+    merge_summaries, new_stats, output, parse_when, report_dict, summarize, write_day_sketches,
+)
+
+# Chunks are sliced out of the map as bytes, so this bounds per-worker memory.
+CHUNK_BYTES = 32 << 20
+
+# jobcomp/filetxt key for each Job field
+JOBCOMP_KEYS = {
+    "jobid": b"JobId", "user": b"UserId", "partition": b"Partition", "state": b"JobState",
+    "submit": b"SubmitTime", "start": b"StartTime", "end": b"EndTime", "cluster": b"Cluster",
+    "alloccpus": b"ProcCnt",
+}
+JOBCOMP_PAIR = re.compile(rb"(\w+)=(\S*)")
+
+
+def detect_format(path: str) -> Tuple[str, Optional[List[Optional[int]]], int]:
+    """Return (kind, column map, offset of first data byte) for an archive file.
+
+    kind is "jobcomp" or "sacct". For sacct dumps the column map gives the
+    position of each Job field in a row, taken from the header line when
+    there is one and assuming FIELDS order otherwise.
+    """
+    with open(path, "rb") as f:
+        first = f.readline()
+    if first.startswith(b"JobId="):
+        return "jobcomp", None, 0
+    names = [n.strip().lower() for n in first.decode(errors="replace").rstrip("\n").split("|")]
+    if "jobid" in names:
+        # header line: map by name, skip it
+        return "sacct", [names.index(f.lower()) if f.lower() in names else None for f in FIELDS], len(first)
+    return "sacct", list(range(len(FIELDS))), 0
+
+
+def line_chunks(path: str, start: int, n: int) -> List[Tuple[int, int]]:
+    """Split [start, size) into about n byte ranges that end on newlines."""
+    size = os.path.getsize(path)
+    if size <= start:
+        return []
+    step = max(1, math.ceil((size - start) / n))
+    bounds = [start]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start + step
+        while pos < size:
+            nl = mm.find(b"\n", pos)
+            if nl == -1:
+                break
+            bounds.append(nl + 1)
+            pos = nl + 1 + step
+    bounds.append(size)
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+
+def parse_sacct_lines(data: bytes, columns: List[Optional[int]]) -> Iterator[Job]:
+    # older dumps may lack trailing columns (e.g. Cluster); those read as ""
+    width = max(c for c in columns if c is not None) + 1
+    padding = [""] * width
+    # common case: a dump written with FIELDS order, take a slice per row
+    in_order = columns == list(range(len(FIELDS)))
+    n_fields = len(FIELDS)
+    # JobID's position; a header may put other columns first
+    jobid = columns[0]
+    # decoding the chunk once is much cheaper than decoding every field;
+    # -p/-P values are never padded, so no strip() either
+    for line in data.decode(errors="replace").split("\n"):
+        values = line.split("|")
+        if len(values) < 2:
+            continue
+        if len(values) < width:
+            values += padding[len(values):]
+        if not values[jobid] or is_step(values[jobid]):
+            continue
+        if in_order:
+            yield Job(*values[:n_fields])
+        else:
+            yield Job(*[values[c] if c is not None else "" for c in columns])
+
+
+def parse_jobcomp_lines(data: bytes) -> Iterator[Job]:
+    keys = [JOBCOMP_KEYS[f] for f in Job._fields]
+    for line in data.split(b"\n"):
+        if not line.startswith(b"JobId="):
+            continue
+        kv = dict(JOBCOMP_PAIR.findall(line))
+        row = [kv.get(k, b"").decode(errors="replace") for k in keys]
+        # UserId=name(uid)
+        row[1] = row[1].split("(", 1)[0]
+        yield Job(*row)
+
+
+def iter_file_jobs(path: str) -> Iterator[Job]:
+    """Every top-level job in one archive file, chunk by chunk in this process."""
+    kind, columns, offset = detect_format(path)
+    for lo, hi in line_chunks(path, offset, math.ceil(os.path.getsize(path) / CHUNK_BYTES)):
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[lo:hi]
+        if kind == "jobcomp":
+            yield from parse_jobcomp_lines(data)
+        else:
+            yield from parse_sacct_lines(data, columns)
+
+
+def scan_chunk(path: str, kind: str, columns: Optional[List[Optional[int]]], lo: int, hi: int,
+               partitions: Optional[List[str]], approx: bool, window: Window,
+               want_sketches: bool) -> Tuple[dict, dict, int]:
+    """Parse one byte range; return (summary, day sketches, jobs parsed)."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[lo:hi]
+    if kind == "jobcomp":
+        parsed = parse_jobcomp_lines(data)
+    else:
+        parsed = parse_sacct_lines(data, columns)
+    start, end = window
+    if start is None and end is None:
+        jobs = list(parsed)
+    else:
+        jobs = [j for j in parsed if in_window(j, start, end)]
+    summary = summarize(jobs, partitions, approx)
+    days = day_sketches(jobs, partitions, window) if want_sketches else {}
+    return summary, days, len(jobs)
+
+
+def offline_summary(paths: List[str], partitions: Optional[List[str]] = None,
+                    approx: bool = False, window: Window = (None, None),
+                    workers: Optional[int] = None, want_sketches: bool = False) -> dict:
+    """Summarize archive files in parallel; same shape as summarize(), plus
+    "jobs_parsed" and, when want_sketches, "days" for write_day_sketches()."""
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for path in paths:
+        kind, columns, offset = detect_format(path)
+        size = os.path.getsize(path)
+        n = max(workers, math.ceil(size / CHUNK_BYTES))
+        for lo, hi in line_chunks(path, offset, n):
+            tasks.append((path, kind, columns, lo, hi, partitions, approx, window, want_sketches))
+
+    total = {"partitions": {}, "all": new_stats(approx)}
+    days: Dict[date, Dict[str, HyperLogLog]] = {}
+    parsed = 0
+    if workers == 1 or len(tasks) <= 1:
+        results = [scan_chunk(*t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan_chunk, *zip(*tasks)))
+    for summary, d, n in results:
+        merge_summaries(total, summary)
+        merge_day_sketches(days, d)
+        parsed += n
+    total["jobs_parsed"] = parsed
+    total["days"] = days
+    return total
+
+
+def main(argv: Optional[List[str]] = None):
+    p = build_parser("Slurm accounting reports from sacct dumps and jobcomp logs.")
+    p.add_argument("files", nargs="+", metavar="FILE", help="sacct -p dump or jobcomp/filetxt log")
+    p.add_argument("--workers", type=int, default=None,
+                   help="parallel parser processes (default: all CPUs)")
+    # archives are usually older than any relative default window
+    p.set_defaults(start=None, end=None)
+    args = p.parse_args(argv)
+    if args.from_sketches:
+        p.error("--from-sketches reads no files; use sacct_reports.py --from-sketches")
+
+    window = (parse_when(args.start), parse_when(args.end))
+    for value, parsed in zip((args.start, args.end), window):
+        if value and parsed is None:
+            p.error(f"cannot parse time {value!r}; use YYYY-MM-DD[THH:MM[:SS]] or now-Ndays")
+    for path in args.files:
+        if not os.path.isfile(path):
+            sys.stderr.write(f"Error: {path} not found.\n")
+            sys.exit(1)
+
+    total = offline_summary(args.files, args.partitions, args.approx, window,
+                            args.workers, want_sketches=bool(args.sketch_dir))
+    if args.sketch_dir:
+        write_day_sketches(total["days"], args.sketch_dir)
+    report = report_dict(total, args.start or "beginning of data", args.end or "end of data")
+    report["sources"] = args.files
+    report["jobs_parsed"] = total["jobs_parsed"]
+    output(report, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# Purpose: several accounting reports from a single sacct scan
+#   - users per partition (users_c7_public_partitions.py)
+#   - top-level job counts per partition
+#   - preemption rate per partition (preempt_stats.sh)
+#
+# Usage: ./sacct_reports.py [-S START] [-E END] [-p PARTITION ...] [--json]
+# Example: ./sacct_reports.py -S 2025-04-01 -E 2025-04-30 -p mit_preemptable
+#
+# Approximate distinct users (HyperLogLog, see hll.py):
+#   --approx                  count users with sketches instead of exact sets
+#   --sketch-dir DIR          also merge this scan into per-day sketches in DIR
+#   --from-sketches DIR       answer users per partition for -S..-E (YYYY-MM-DD)
+#                             from stored daily sketches, without calling sacct
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hll import HyperLogLog
+from users_c7_public_partitions import START, END, iter_sacct_fields, sacct_fields
+
+# Fields requested from sacct, in order. Job mirrors them one-to-one.
+FIELDS = ["JobID", "User", "Partition", "State", "Submit", "Start", "End", "Cluster", "AllocCPUS"]
+Job = namedtuple("Job", ["jobid", "user", "partition", "state", "submit", "start", "end", "cluster",
+                         "alloccpus"])
+
+SACCT_TIME = "%Y-%m-%dT%H:%M:%S"
+# (start, end) of a report; None leaves that side open
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+# HyperLogLog precision for --approx: 2**12 registers, ~1.6% error.
+HLL_PRECISION = 12
+
+
+def is_step(jobid: str) -> bool:
+    """Job steps (123.batch, 123.extern, 123.0) carry a '.' in the JobID."""
+    return "." in jobid
+
+
+def is_preempted(state: str) -> bool:
+    return state.startswith("PREEMPTED")
+
+
+def parse_time(value: str) -> Optional[datetime]:
+    """sacct timestamps; "Unknown"/"None" (not started, still running) -> None."""
+    try:
+        return datetime.strptime(value, SACCT_TIME)
+    except ValueError:
+        return None
+
+
+def parse_when(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """The subset of sacct -S/-E syntax the scripts here use: now, now-N{days,hours,minutes},
+    YYYY-MM-DD[THH:MM[:SS]]. Anything else -> None."""
+    if not value:
+        return None
+    now = now or datetime.now()
+    if value == "now":
+        return now
+    m = re.fullmatch(r"now-(\d+)(days|hours|minutes)", value)
+    if m:
+        return now - timedelta(**{m.group(2): int(m.group(1))})
+    for fmt in (SACCT_TIME, "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def in_window(job: Job, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """sacct's -S/-E rule: the job was eligible or running at some point in [start, end]."""
+    if end is not None:
+        first = parse_time(job.start) or parse_time(job.submit)
+        if first is not None and first > end:
+            return False
+    if start is not None:
+        last = parse_time(job.end)
+        if last is not None and last < start:
+            return False
+    return True
+
+
+def sacct_extra(partitions: Optional[List[str]] = None, duplicates: bool = False) -> List[str]:
+    # -X asks slurmdbd for allocations only, so steps never leave the
+    # database; is_step() still guards against dumps made without it.
+    extra = ["-X"]
+    if duplicates:
+        # every attempt of a requeued job, not just the last one
+        extra.append("-D")
+    if partitions:
+        extra.append("--partition=" + ",".join(partitions))
+    return extra
+
+
+def sacct_jobs(start: str, end: str, partitions: Optional[List[str]] = None) -> List[Job]:
+    """Top-level jobs in the window, one sacct call."""
+    return [Job(*row) for row in sacct_fields(start, end, FIELDS, sacct_extra(partitions))
+            if row[0] and not is_step(row[0])]
+
+
+def iter_sacct_jobs(start: str, end: str, partitions: Optional[List[str]] = None,
+                    duplicates: bool = False) -> Iterator[Job]:
+    """Streaming sacct_jobs(): rows are parsed as sacct writes them."""
+    for row in iter_sacct_fields(start, end, FIELDS, sacct_extra(partitions, duplicates)):
+        if row[0] and not is_step(row[0]):
+            yield Job(*row)
+
+
+def new_stats(approx: bool = False) -> dict:
+    users = HyperLogLog(HLL_PRECISION) if approx else set()
+    return {"users": users, "jobs": 0, "preempted": 0}
+
+
+def add_job(s: dict, job: Job) -> None:
+    if job.user:
+        s["users"].add(job.user)
+    s["jobs"] += 1
+    if is_preempted(job.state):
+        s["preempted"] += 1
+
+
+def summarize(jobs: Iterable[Job], partitions: Optional[List[str]] = None,
+              approx: bool = False) -> dict:
+    """Compute every report in one pass over jobs.
+
+    Returns {"partitions": {name: stats}, "all": stats}; a job listed under
+    several partitions counts once per partition but once in "all". With
+    approx, users are HyperLogLog sketches rather than sets.
+    """
+    wanted = set(partitions) if partitions else None
+    by_part: Dict[str, dict] = {}
+    overall = new_stats(approx)
+    for job in jobs:
+        if is_step(job.jobid):
+            continue
+        # pending jobs submitted to several partitions report "a,b"
+        matched = False
+        for part in job.partition.split(","):
+            if not part or (wanted is not None and part not in wanted):
+                continue
+            s = by_part.get(part)
+            if s is None:
+                s = by_part[part] = new_stats(approx)
+            add_job(s, job)
+            matched = True
+        if matched:
+            add_job(overall, job)
+    return {"partitions": by_part, "all": overall}
+
+
+def merge_summaries(into: dict, other: dict) -> dict:
+    """Fold summary `other` into `into` (both from summarize()) and return it."""
+    def merge_stats(a: dict, b: dict) -> None:
+        if isinstance(a["users"], HyperLogLog):
+            a["users"].merge(b["users"])
+        else:
+            a["users"] |= b["users"]
+        a["jobs"] += b["jobs"]
+        a["preempted"] += b["preempted"]
+
+    for part, s in other["partitions"].items():
+        if part in into["partitions"]:
+            merge_stats(into["partitions"][part], s)
+        else:
+            into["partitions"][part] = s
+    merge_stats(into["all"], other["all"])
+    return into
+
+
+def preemption_rate(preempted: int, total: int) -> float:
+    return preempted / total * 100 if total > 0 else 0.0
+
+
+def users_dict(users, with_users: bool = True) -> dict:
+    if isinstance(users, HyperLogLog):
+        return {
+            "user_count": round(users.count()),
+            "user_count_error": round(users.relative_error, 4),
+            "approximate": True,
+        }
+    d = {"user_count": len(users)}
+    if with_users:
+        d["users"] = sorted(users)
+    return d
+
+
+def stats_dict(s: dict, with_users: bool = True) -> dict:
+    d = users_dict(s["users"], with_users)
+    d.update({
+        "jobs": s["jobs"],
+        "preempted": s["preempted"],
+        "preemption_rate": round(preemption_rate(s["preempted"], s["jobs"]), 2),
+    })
+    return d
+
+
+def report_dict(summary: dict, start: str, end: str) -> dict:
+    parts = summary["partitions"]
+    return {
+        "start": start,
+        "end": end,
+        "partitions": {p: stats_dict(parts[p]) for p in sorted(parts)},
+        "totals": stats_dict(summary["all"], with_users=False),
+    }
+
+
+def job_days(job: Job, window: Window = (None, None)) -> List[date]:
+    """Calendar days a job was running: Start through End, clipped to the window.
+
+    Jobs that never started (pending, cancelled in the queue) have none. A
+    job still running runs to the window end, or to now without one.
+    """
+    first = parse_time(job.start)
+    if first is None:
+        return []
+    start, end = window
+    last = parse_time(job.end) or end or datetime.now()
+    if start is not None:
+        first = max(first, start)
+    if end is not None:
+        last = min(last, end)
+    days = []
+    d = first.date()
+    while d <= last.date():
+        days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def sketch_path(sketch_dir: str, day: date) -> str:
+    return os.path.join(sketch_dir, f"{day.isoformat()}.json")
+
+
+def load_day_sketches(path: str) -> Dict[str, HyperLogLog]:
+    with open(path) as f:
+        return {part: HyperLogLog.from_string(s) for part, s in json.load(f).items()}
+
+
+def day_sketches(jobs: Iterable[Job], partitions: Optional[List[str]] = None,
+                 window: Window = (None, None),
+                 ) -> Dict[date, Dict[str, HyperLogLog]]:
+    """Per-day, per-partition user sketches for jobs, over the days of the window they ran."""
+    wanted = set(partitions) if partitions else None
+    days: Dict[date, Dict[str, HyperLogLog]] = {}
+    for job in jobs:
+        if is_step(job.jobid) or not job.user:
+            continue
+        parts = [p for p in job.partition.split(",") if p and (wanted is None or p in wanted)]
+        if not parts:
+            continue
+        for day in job_days(job, window):
+            sketches = days.setdefault(day, {})
+            for part in parts:
+                h = sketches.get(part)
+                if h is None:
+                    h = sketches[part] = HyperLogLog(HLL_PRECISION)
+                h.add(job.user)
+    return days
+
+
+def merge_day_sketches(into: Dict[date, Dict[str, HyperLogLog]],
+                       other: Dict[date, Dict[str, HyperLogLog]]) -> None:
+    for day, sketches in other.items():
+        target = into.setdefault(day, {})
+        for part, h in sketches.items():
+            if part in target:
+                target[part].merge(h)
+            else:
+                target[part] = h
+
+
+def write_day_sketches(days: Dict[date, Dict[str, HyperLogLog]], sketch_dir: str) -> int:
+    """Merge day sketches into DIR/YYYY-MM-DD.json, one sketch per partition.
+
+    Existing files are merged, not replaced, so overlapping scans are
+    harmless. Returns the number of day files written.
+    """
+    os.makedirs(sketch_dir, exist_ok=True)
+    for day, sketches in days.items():
+        path = sketch_path(sketch_dir, day)
+        if os.path.exists(path):
+            for part, old in load_day_sketches(path).items():
+                if part in sketches:
+                    sketches[part].merge(old)
+                else:
+                    sketches[part] = old
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({part: h.to_string() for part, h in sorted(sketches.items())}, f)
+        os.replace(tmp, path)
+    return len(days)
+
+
+def store_day_sketches(jobs: Iterable[Job], sketch_dir: str, partitions: Optional[List[str]] = None,
+                       window: Window = (None, None)) -> int:
+    return write_day_sketches(day_sketches(jobs, partitions, window), sketch_dir)
+
+
+def query_sketches(sketch_dir: str, start: date, end: date,
+                   partitions: Optional[List[str]] = None) -> dict:
+    """Distinct users per partition over start..end from stored daily sketches.
+
+    Memory stays at one sketch per partition however long the range is.
+    Returns {"partitions": {name: sketch}, "all": sketch, "missing_days": [...]}.
+    """
+    wanted = set(partitions) if partitions else None
+    by_part: Dict[str, HyperLogLog] = {}
+    overall = HyperLogLog(HLL_PRECISION)
+    missing = []
+    d = start
+    while d <= end:
+        path = sketch_path(sketch_dir, d)
+        if not os.path.exists(path):
+            missing.append(d.isoformat())
+        else:
+            for part, h in load_day_sketches(path).items():
+                if wanted is not None and part not in wanted:
+                    continue
+                if part in by_part:
+                    by_part[part].merge(h)
+                else:
+                    by_part[part] = h
+                overall.merge(h)
+        d += timedelta(days=1)
+    return {"partitions": by_part, "all": overall, "missing_days": missing}
+
+
+def format_user_count(r: dict) -> str:
+    if r.get("approximate"):
+        return f"~{r['user_count']} (±{r['user_count_error'] * 100:.1f}%)"
+    return str(r["user_count"])
+
+
+def print_text(report: dict, list_users: bool = False) -> None:
+    print("# Time window:", report["start"], "to", report["end"])
+    print()
+    for part, r in report["partitions"].items():
+        print(f"Partition '{part}':")
+        print(f"  Users: {format_user_count(r)}")
+        if report.get("sketches_only"):
+            print()
+            continue
+        print(f"  Total top-level jobs: {r['jobs']}")
+        print(f"  Preempted top-level jobs: {r['preempted']}")
+        print(f"  Preemption rate: {r['preemption_rate']:.2f}%")
+        if list_users and "users" in r:
+            for u in r["users"]:
+                print(f"    {u}")
+        print()
+    t = report["totals"]
+    print("All partitions:")
+    print(f"  Users: {format_user_count(t)}")
+    if report.get("sketches_only"):
+        if report.get("missing_days"):
+            print(f"  Days without sketches: {len(report['missing_days'])}")
+        return
+    print(f"  Total top-level jobs: {t['jobs']}")
+    print(f"  Preempted top-level jobs: {t['preempted']}")
+    print(f"  Preemption rate: {t['preemption_rate']:.2f}%")
+
+
+def build_parser(description: str = "Single-pass Slurm accounting reports.") -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("-S", "--start", default=START, help=f"window start (default {START})")
+    p.add_argument("-E", "--end", default=END, help=f"window end (default {END})")
+    p.add_argument("-p", "--partition", action="append", dest="partitions",
+                   help="partition to report on; repeat for several (default: all)")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    p.add_argument("--list-users", action="store_true", help="list users under each partition")
+    p.add_argument("--approx", action="store_true",
+                   help="count distinct users with HyperLogLog sketches instead of exact sets")
+    p.add_argument("--sketch-dir", metavar="DIR",
+                   help="merge this scan's users into per-day sketches stored in DIR")
+    p.add_argument("--from-sketches", metavar="DIR",
+                   help="report distinct users for -S..-E (YYYY-MM-DD) from sketches in DIR; no sacct")
+    return p
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    if args.from_sketches:
+        try:
+            start = date.fromisoformat(args.start)
+            end = date.fromisoformat(args.end)
+        except ValueError:
+            sys.stderr.write("Error: --from-sketches needs -S and -E as YYYY-MM-DD.\n")
+            sys.exit(1)
+        sketches = query_sketches(args.from_sketches, start, end, args.partitions)
+        report = {
+            "start": args.start,
+            "end": args.end,
+            "sketches_only": True,
+            "missing_days": sketches["missing_days"],
+            "partitions": {p: users_dict(h) for p, h in sorted(sketches["partitions"].items())},
+            "totals": users_dict(sketches["all"]),
+        }
+        output(report, args)
+        return
+
+    # verify sacct exists
+    if shutil.which("sacct") is None:
+        sys.stderr.write("Error: sacct not found on PATH.\n")
+        sys.exit(1)
+
+    if args.sketch_dir:
+        # two consumers, so keep the rows
+        jobs = sacct_jobs(args.start, args.end, args.partitions)
+        store_day_sketches(jobs, args.sketch_dir, args.partitions,
+                           (parse_when(args.start), parse_when(args.end)))
+    else:
+        jobs = iter_sacct_jobs(args.start, args.end, args.partitions)
+    report = report_dict(summarize(jobs, args.partitions, args.approx), args.start, args.end)
+    output(report, args)
+
+
+def output(report: dict, args: argparse.Namespace) -> None:
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_text(report, args.list_users)
+
+
+if __name__ == "__main__":
+    main()
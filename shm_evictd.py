@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# Purpose: keep /dev/shm from filling the node, evicting only when memory is
+#   actually short instead of once a day by age (clean-devshm-notify.sh).
+#   Usage is checked with statvfs every --interval seconds, and sooner (but
+#   at most every --min-gap seconds) when inotify reports a new or grown
+#   file. Once it passes --high percent, files that no process has open or
+#   mapped (shm_reaper.ProcIndex, one /proc pass per eviction round) are
+#   deleted until usage is below --low percent:
+#     1. users over --quota first, their least recently used files, down to
+#        their quota
+#     2. then everyone's, least recently used first
+#   "Used" is the latest open/access/write seen by inotify, else the file's
+#   atime/mtime. Files younger than --min-age are never touched, nor files
+#   of users whose processes cannot be inspected. Every decision is logged.
+#
+# Usage: ./shm_evictd.py [--high PCT] [--low PCT] [--quota SIZE] [--dry-run] [--once] [--shm-dir DIR]
+# Example: ./shm_evictd.py --high 80 --low 60 --quota 16G >> /var/log/shm_evictd.log 2>&1
+import argparse
+import ctypes
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from shm_reaper import PROC, SHM_DIR, ProcIndex, owner
+
+HIGH = 90.0
+LOW = 75.0
+INTERVAL = 10.0
+MIN_AGE = 60.0
+# a busy writer sends a stream of events; check at most this often for them
+MIN_GAP = 5.0
+
+# inotify(7)
+IN_ACCESS = 0x001
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_OPEN = 0x020
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+EVENT = struct.Struct("iIII")
+WATCH = IN_ACCESS | IN_MODIFY | IN_CLOSE_WRITE | IN_OPEN | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# events that can mean more bytes in use
+GROW = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+def log(msg: str) -> None:
+    print(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {msg}", flush=True)
+
+
+def parse_size(value: str) -> int:
+    """'512M', '16G', '1T' or plain bytes."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+class Inotify:
+    """Top-level watch on the tmpfs through libc; no third-party module."""
+
+    def __init__(self, path: str):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+
+    def read(self, timeout: float) -> List[Tuple[int, str]]:
+        """(mask, name) events, waiting at most timeout seconds for the first."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        i = 0
+        while i < len(data):
+            _, mask, _, length = EVENT.unpack_from(data, i)
+            name = data[i + EVENT.size:i + EVENT.size + length].rstrip(b"\0").decode(errors="replace")
+            events.append((mask, name))
+            i += EVENT.size + length
+        return events
+
+
+def usage(shm_dir: str) -> Tuple[int, int]:
+    """(bytes used, bytes total) of the filesystem."""
+    st = os.statvfs(shm_dir)
+    total = st.f_blocks * st.f_frsize
+    return total - st.f_bfree * st.f_frsize, total
+
+
+def scan(shm_dir: str) -> List[Tuple[str, int, int, float, float]]:
+    """(path, uid, bytes allocated, last used, mtime) for every file under shm_dir."""
+    files = []
+    for root, _, names in os.walk(shm_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            files.append((path, st.st_uid, st.st_blocks * 512, max(st.st_atime, st.st_mtime), st.st_mtime))
+    return files
+
+
+def plan(files: List[Tuple[str, int, int, float, float]], index: ProcIndex, need: int,
+         quota: Optional[int], last_seen: Dict[str, float], now: float,
+         min_age: float) -> List[Tuple[str, int, int, str, float]]:
+    """(path, uid, bytes, reason, last used) to delete, in order, to free at least need bytes."""
+    per_user: Dict[int, int] = {}
+    for _, uid, size, _, _ in files:
+        per_user[uid] = per_user.get(uid, 0) + size
+    candidates = []
+    for path, uid, size, used, mtime in files:
+        if path in index.paths or uid in index.unreadable_uids or now - mtime < min_age:
+            continue
+        candidates.append((max(used, last_seen.get(path, 0.0)), path, uid, size))
+    candidates.sort()
+
+    chosen: List[Tuple[str, int, int, str, float]] = []
+    taken = set()
+    freed = 0
+    if quota is not None:
+        for used, path, uid, size in candidates:
+            if freed >= need:
+                break
+            if per_user[uid] > quota:
+                chosen.append((path, uid, size, "over-quota", used))
+                taken.add(path)
+                per_user[uid] -= size
+                freed += size
+    for used, path, uid, size in candidates:
+        if freed >= need:
+            break
+        if path not in taken:
+            chosen.append((path, uid, size, "lru", used))
+            freed += size
+    return chosen
+
+
+def evict(shm_dir: str, high: float, low: float, quota: Optional[int], last_seen: Dict[str, float],
+          min_age: float, dry_run: bool, proc: str = PROC) -> None:
+    used, total = usage(shm_dir)
+    if not total or used * 100 / total < high:
+        return
+    need = used - int(total * low / 100)
+    log(f"{shm_dir} at {used * 100 / total:.1f}% (high {high:g}%), freeing {need} bytes to reach {low:g}%")
+    now = time.time()
+    files = scan(shm_dir)
+    index = ProcIndex(proc, shm_dir)
+    chosen = plan(files, index, need, quota, last_seen, now, min_age)
+    freed = 0
+    for path, uid, size, reason, used in chosen:
+        log(f"{'would evict' if dry_run else 'evict'} {path} owner={owner(uid)} bytes={size} "
+            f"reason={reason} idle={now - used:.0f}s")
+        if dry_run:
+            freed += size
+            continue
+        try:
+            os.unlink(path)
+            freed += size
+            last_seen.pop(path, None)
+        except OSError as e:
+            log(f"error {path}: {e.strerror}")
+    skipped = len(files) - len(chosen)
+    if freed < need:
+        log(f"freed {freed} of {need} bytes; the other {skipped} files are open, mapped, "
+            f"younger than {min_age:g}s or not inspectable")
+    else:
+        log(f"freed {freed} bytes")
+
+
+def run(args: argparse.Namespace) -> None:
+    quota = parse_size(args.quota) if args.quota else None
+    last_seen: Dict[str, float] = {}
+    watcher = None
+    if not args.once:
+        try:
+            watcher = Inotify(args.shm_dir)
+        except OSError as e:
+            log(f"inotify unavailable ({e}); polling every {args.interval:g}s")
+    log(f"watching {args.shm_dir}: high {args.high:g}%, low {args.low:g}%, "
+        f"quota {args.quota or 'none'}{', dry run' if args.dry_run else ''}")
+    last_check = -args.interval
+    next_check = 0.0
+    while True:
+        now = time.time()
+        if watcher is not None:
+            for mask, name in watcher.read(max(next_check - now, 0)):
+                path = os.path.join(args.shm_dir, name)
+                if mask & IN_DELETE:
+                    last_seen.pop(path, None)
+                    continue
+                last_seen[path] = time.time()
+                if mask & GROW:
+                    # check early, but not sooner than min_gap after the last check
+                    next_check = min(next_check, last_check + args.min_gap)
+        elif now < next_check:
+            time.sleep(next_check - now)
+            continue
+        if time.time() >= next_check:
+            # evict() only walks the tmpfs once statvfs shows it above --high
+            evict(args.shm_dir, args.high, args.low, quota, last_seen, args.min_age, args.dry_run, args.proc)
+            last_check = time.time()
+            next_check = last_check + args.interval
+        if args.once:
+            return
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Evict unused /dev/shm files when the tmpfs runs short.")
+    p.add_argument("--shm-dir", default=SHM_DIR, help=f"tmpfs to watch (default {SHM_DIR})")
+    p.add_argument("--high", type=float, default=HIGH, help=f"start evicting above this %% used (default {HIGH:g})")
+    p.add_argument("--low", type=float, default=LOW, help=f"stop once below this %% used (default {LOW:g})")
+    p.add_argument("--quota", help="per-user size (e.g. 16G); users over it are evicted first")
+    p.add_argument("--min-age", type=float, default=MIN_AGE,
+                   help=f"never evict files modified less than this many seconds ago (default {MIN_AGE:g})")
+    p.add_argument("--interval", type=float, default=INTERVAL,
+                   help=f"seconds between statvfs checks (default {INTERVAL:g})")
+    p.add_argument("--min-gap", type=float, default=MIN_GAP,
+                   help=f"least seconds between checks triggered by file events (default {MIN_GAP:g})")
+    p.add_argument("-n", "--dry-run", action="store_true", help="log what would be evicted")
+    p.add_argument("--once", action="store_true", help="check once and exit")
+    p.add_argument("--proc", default=PROC, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+    if not 0 < args.low < args.high <= 100:
+        p.error("need 0 < --low < --high <= 100")
+    if args.quota:
+        try:
+            parse_size(args.quota)
+        except ValueError:
+            p.error(f"bad --quota {args.quota!r}; use bytes or a size like 512M, 16G")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.shm_dir):
+        sys.stderr.write(f"Error: {args.shm_dir} is not a directory.\n")
+        sys.exit(1)
+    try:
+        run(args)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
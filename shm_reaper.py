@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# Purpose: clean /dev/shm and orphaned System V shared memory without
+#   touching anything still in use -- the single-pass replacement for the
+#   lsof/ipcs loops in clean-devshm-notify.sh.
+#   /proc is read once: every /proc/PID/fd link and /proc/PID/maps line that
+#   points into /dev/shm (or at a SYSV segment) goes into a hash set, and
+#   /proc/sysvipc/shm is read once. Then:
+#     - files in /dev/shm older than --age-days that no process has open or
+#       mapped are deleted, then empty directories
+#     - a SysV segment is removed only if nattch == 0, no process maps it,
+#       and both its creator (cpid) and last user (lpid) are dead, so live
+#       MPI / PyTorch segments between attaches are kept
+#   Processes whose fd/maps cannot be read (not root) make their owner's
+#   files "unknown" and those are kept.
+#
+# Usage: ./shm_reaper.py [--dry-run] [--age-days N] [--shm-dir DIR] [--json]
+# Example: ./shm_reaper.py --dry-run --json
+# Cron line:
+# 0 3 * * * /path/to/shm_reaper.py >> /var/log/clean_shm.log 2>&1
+import argparse
+import ctypes
+import json
+import os
+import pwd
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+SHM_DIR = "/dev/shm"
+PROC = "/proc"
+AGE_DAYS = 1.0
+IPC_RMID = 0
+# /proc/PID/maps marks unlinked files like this
+DELETED = " (deleted)"
+
+
+class ProcIndex:
+    """What every process has open or mapped, from one pass over /proc."""
+
+    def __init__(self, proc: str = PROC, shm_dir: str = SHM_DIR):
+        self.pids: Set[int] = set()
+        self.paths: Set[str] = set()           # /dev/shm paths open or mapped
+        self.shmids: Set[int] = set()          # SysV segments mapped
+        self.unreadable_uids: Set[int] = set()  # owners of processes we could not inspect
+        prefix = shm_dir.rstrip("/") + "/"
+        for entry in os.scandir(proc):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            self.pids.add(pid)
+            try:
+                for fd in os.scandir(f"{entry.path}/fd"):
+                    try:
+                        target = os.readlink(fd.path)
+                    except OSError:
+                        continue  # fd closed since the scandir
+                    if target.startswith(prefix):
+                        self.paths.add(target)
+                with open(f"{entry.path}/maps") as f:
+                    for line in f:
+                        if prefix in line:
+                            path = line[line.index(prefix):].rstrip("\n")
+                            # slice, not str.removesuffix: sweeps run this on the nodes' python3 (3.6)
+                            if path.endswith(DELETED):
+                                path = path[:-len(DELETED)]
+                            self.paths.add(path)
+                        elif "/SYSV" in line:
+                            # for SysV mappings the inode column is the shmid
+                            self.shmids.add(int(line.split()[4]))
+            except PermissionError:
+                try:
+                    self.unreadable_uids.add(entry.stat().st_uid)
+                except OSError:
+                    pass
+            except (FileNotFoundError, ProcessLookupError):
+                self.pids.discard(pid)  # exited mid-scan
+
+
+def read_sysv_shm(path: str = f"{PROC}/sysvipc/shm") -> List[Dict[str, int]]:
+    """Rows of /proc/sysvipc/shm as dicts of ints, keyed by its header."""
+    with open(path) as f:
+        header = f.readline().split()
+        return [dict(zip(header, (int(v) for v in line.split()))) for line in f if line.strip()]
+
+
+_owners: Dict[int, str] = {}
+
+
+def owner(uid: int) -> str:
+    if uid not in _owners:
+        try:
+            _owners[uid] = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            _owners[uid] = str(uid)
+    return _owners[uid]
+
+
+def stale_files(index: ProcIndex, shm_dir: str, age_days: float,
+                now: Optional[float] = None) -> Tuple[List[Tuple[str, os.stat_result]], List[str]]:
+    """(files to delete with their stat, files kept because their owner's processes are unreadable)."""
+    cutoff = (now or time.time()) - age_days * 86400
+    stale, unknown = [], []
+    for entry in os.scandir(shm_dir):
+        if not entry.is_file(follow_symlinks=False):
+            continue
+        st = entry.stat(follow_symlinks=False)
+        if st.st_mtime > cutoff or entry.path in index.paths:
+            continue
+        if st.st_uid in index.unreadable_uids:
+            unknown.append(entry.path)
+            continue
+        stale.append((entry.path, st))
+    return stale, unknown
+
+
+def orphaned_segments(index: ProcIndex, segments: List[Dict[str, int]]) -> List[Dict[str, int]]:
+    return [s for s in segments
+            if s["nattch"] == 0 and s["shmid"] not in index.shmids
+            and s["cpid"] not in index.pids and s["lpid"] not in index.pids]
+
+
+def remove_segment(shmid: int) -> None:
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.shmctl(ctypes.c_int(shmid), IPC_RMID, None) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def reap(shm_dir: str = SHM_DIR, proc: str = PROC, age_days: float = AGE_DAYS, dry_run: bool = False,
+         log=print) -> dict:
+    """Clean shm_dir and SysV segments; returns counts, bytes and bytes per owner."""
+    t0 = time.monotonic()
+    index = ProcIndex(proc, shm_dir)
+    result = {"files_removed": 0, "file_bytes": 0, "dirs_removed": 0, "segments_removed": 0,
+              "segment_bytes": 0, "kept_unknown": 0, "errors": 0, "owners": {}, "dry_run": dry_run}
+    verb = "Would delete" if dry_run else "Deleting"
+    seg_verb = "Would remove" if dry_run else "Removing"
+
+    def count(uid: int, size: int) -> None:
+        name = owner(uid)
+        result["owners"][name] = result["owners"].get(name, 0) + size
+
+    stale, unknown = stale_files(index, shm_dir, age_days)
+    result["kept_unknown"] = len(unknown)
+    for path, st in stale:
+        log(f"{verb} stale file: {path} (Owner: {owner(st.st_uid)}, {st.st_size} bytes)")
+        try:
+            if not dry_run:
+                os.unlink(path)
+        except OSError as e:
+            log(f"Error: {path}: {e.strerror}")
+            result["errors"] += 1
+            continue
+        result["files_removed"] += 1
+        # tmpfs frees allocated blocks, which is what the node was short of
+        result["file_bytes"] += st.st_blocks * 512
+        count(st.st_uid, st.st_blocks * 512)
+
+    cutoff = time.time() - age_days * 86400
+    for entry in os.scandir(shm_dir):
+        if entry.is_dir(follow_symlinks=False) and not entry.is_symlink():
+            st = entry.stat(follow_symlinks=False)
+            if st.st_mtime > cutoff:
+                continue
+            try:
+                if next(os.scandir(entry.path), None) is not None:
+                    continue
+                log(f"{verb} empty directory: {entry.path} (Owner: {owner(st.st_uid)})")
+                if not dry_run:
+                    os.rmdir(entry.path)
+                result["dirs_removed"] += 1
+            except OSError as e:
+                log(f"Error: {entry.path}: {e.strerror}")
+                result["errors"] += 1
+
+    try:
+        segments = read_sysv_shm(f"{proc}/sysvipc/shm")
+    except OSError:
+        segments = []
+    for s in orphaned_segments(index, segments):
+        log(f"{seg_verb} IPC shared memory segment "
+            f"ID: {s['shmid']} (Owner: {owner(s['uid'])}, {s['size']} bytes, cpid {s['cpid']}, lpid {s['lpid']})")
+        try:
+            if not dry_run:
+                remove_segment(s["shmid"])
+        except OSError as e:
+            log(f"Error: segment {s['shmid']}: {e.strerror}")
+            result["errors"] += 1
+            continue
+        result["segments_removed"] += 1
+        result["segment_bytes"] += s["size"]
+        count(s["uid"], s["size"])
+
+    result["bytes_reclaimed"] = result["file_bytes"] + result["segment_bytes"]
+    result["seconds"] = round(time.monotonic() - t0, 4)
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Remove stale /dev/shm files and orphaned SysV segments.")
+    p.add_argument("-n", "--dry-run", action="store_true", help="report what would be removed")
+    p.add_argument("--age-days", type=float, default=AGE_DAYS,
+                   help=f"files untouched this long are candidates (default {AGE_DAYS:g})")
+    p.add_argument("--shm-dir", default=SHM_DIR, help=f"tmpfs to clean (default {SHM_DIR})")
+    p.add_argument("--proc", default=PROC, help=argparse.SUPPRESS)
+    p.add_argument("--json", action="store_true", help="print the summary as JSON (log lines go to stderr)")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.shm_dir):
+        sys.stderr.write(f"Error: {args.shm_dir} is not a directory.\n")
+        sys.exit(1)
+    log = (lambda msg: print(msg, file=sys.stderr)) if args.json else print
+    result = reap(args.shm_dir, args.proc, args.age_days, args.dry_run, log)
+    result["host"] = os.uname().nodename
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Cleanup complete{' (dry run)' if args.dry_run else ''}. Removed {result['files_removed']} "
+              f"file(s), {result['dirs_removed']} dir(s), {result['segments_removed']} segment(s); "
+              f"{result['bytes_reclaimed']} bytes in {result['seconds']}s.")
+    if result["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
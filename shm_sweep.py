@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Purpose: run shm_reaper.py on many nodes at once and report on all of them
+#   -- an on-demand sweep when a node's /dev/shm fills up, or a cluster-wide
+#   dry run to see who is holding shared memory.
+#   shm_reaper.py is piped to `python3 -` over ssh, so nothing has to be
+#   installed on the nodes. At most --parallel ssh sessions run at a time;
+#   each node's JSON summary is collected into one report with per-node
+#   rows, totals and the top owners across the cluster. Nodes that fail or
+#   time out are listed with their error.
+#
+# Usage: ./shm_sweep.py [--dry-run] [-f HOSTFILE] [--parallel N] [--top N] [--json] [HOST ...]
+# Example: ./shm_sweep.py --dry-run 'node[1001-1064]' --parallel 16
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from slurm_hosts import expand_hosts
+
+SSH = "ssh -o BatchMode=yes -o ConnectTimeout=10"
+REAPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shm_reaper.py")
+PARALLEL = 32
+TIMEOUT = 120
+
+
+def sweep_node(host: str, ssh: str, remote_args: List[str], script: bytes,
+               python: str = "python3", timeout: float = TIMEOUT) -> dict:
+    """Run the reaper on one host; its JSON summary, or an error entry."""
+    t0 = time.monotonic()
+    remote = f"{python} - {shlex.join(remote_args)}"
+    try:
+        out = subprocess.run(shlex.split(ssh) + [host, remote], input=script,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"host": host, "error": f"timed out after {timeout:g}s", "seconds": round(time.monotonic() - t0, 3)}
+    except OSError as e:
+        return {"host": host, "error": str(e), "seconds": round(time.monotonic() - t0, 3)}
+    stdout = out.stdout.decode(errors="replace").strip()
+    try:
+        # the summary is the last line; anything before it is noise from the login shell
+        result = json.loads(stdout.splitlines()[-1])
+    except (ValueError, IndexError):
+        err = out.stderr.decode(errors="replace").strip().splitlines()
+        return {"host": host, "error": err[-1] if err else f"exit status {out.returncode}, no summary",
+                "seconds": round(time.monotonic() - t0, 3)}
+    # the reaper exits 1 when some removals failed; the summary still counts
+    result["host"] = host
+    result["error"] = None
+    result["log"] = out.stderr.decode(errors="replace").splitlines()
+    result["seconds"] = round(time.monotonic() - t0, 3)
+    return result
+
+
+def sweep(hosts: List[str], ssh: str = SSH, remote_args: Optional[List[str]] = None,
+          parallel: int = PARALLEL, python: str = "python3", timeout: float = TIMEOUT) -> dict:
+    """Sweep every host through a pool of at most `parallel` ssh sessions."""
+    with open(REAPER, "rb") as f:
+        script = f.read()
+    remote_args = ["--json"] + (remote_args or [])
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(hosts)))) as pool:
+        nodes = list(pool.map(lambda h: sweep_node(h, ssh, remote_args, script, python, timeout), hosts))
+
+    totals = {k: 0 for k in ("files_removed", "dirs_removed", "segments_removed",
+                             "file_bytes", "segment_bytes", "bytes_reclaimed", "kept_unknown", "errors")}
+    owners: Dict[str, int] = {}
+    for node in nodes:
+        if node["error"]:
+            continue
+        for k in totals:
+            totals[k] += node.get(k, 0)
+        for user, size in node.get("owners", {}).items():
+            owners[user] = owners.get(user, 0) + size
+    return {
+        "hosts": len(hosts),
+        "ok": sum(1 for n in nodes if not n["error"]),
+        "failed": sum(1 for n in nodes if n["error"]),
+        "seconds": round(time.monotonic() - t0, 3),
+        "totals": totals,
+        "owners": dict(sorted(owners.items(), key=lambda kv: -kv[1])),
+        "nodes": nodes,
+    }
+
+
+def human(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TiB"
+
+
+def print_text(report: dict, dry_run: bool, top: int) -> None:
+    verb = "reclaimable" if dry_run else "reclaimed"
+    t = report["totals"]
+    print(f"# {report['hosts']} nodes, {report['ok']} ok, {report['failed']} failed, {report['seconds']}s"
+          + (" (dry run)" if dry_run else ""))
+    print()
+    print(f"{'node':<24} {'files':>7} {'segments':>9} {verb:>12} {'seconds':>8}  status")
+    for n in sorted(report["nodes"], key=lambda n: (n["error"] is None, -n.get("bytes_reclaimed", 0))):
+        if n["error"]:
+            print(f"{n['host']:<24} {'-':>7} {'-':>9} {'-':>12} {n['seconds']:>8}  failed: {n['error']}")
+            continue
+        status = f"{n['errors']} removal errors" if n.get("errors") else "ok"
+        print(f"{n['host']:<24} {n['files_removed']:>7} {n['segments_removed']:>9} "
+              f"{human(n['bytes_reclaimed']):>12} {n['seconds']:>8}  {status}")
+    print()
+    print(f"Total: {t['files_removed']} files, {t['dirs_removed']} dirs, {t['segments_removed']} segments, "
+          f"{human(t['bytes_reclaimed'])} {verb}")
+    if report["owners"]:
+        print(f"Top {top} owners:")
+        for user, size in list(report["owners"].items())[:top]:
+            print(f"  {user:<24} {human(size):>12}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Clean or scan /dev/shm and SysV shm on many nodes at once.")
+    p.add_argument("hosts", nargs="*", metavar="HOST", help="node name or Slurm range like node[1-4]")
+    p.add_argument("-f", "--host-file", help="file with one host per line")
+    p.add_argument("-n", "--dry-run", action="store_true", help="only report what would be removed")
+    p.add_argument("--age-days", type=float, help="passed to shm_reaper.py")
+    p.add_argument("--shm-dir", help="passed to shm_reaper.py")
+    p.add_argument("--parallel", type=int, default=PARALLEL, help=f"ssh sessions at once (default {PARALLEL})")
+    p.add_argument("--timeout", type=float, default=TIMEOUT, help=f"seconds per node (default {TIMEOUT})")
+    p.add_argument("--ssh", default=SSH, help=f"ssh command (default: {SSH})")
+    p.add_argument("--python", default="python3",
+                   help="remote interpreter, e.g. 'sudo python3' when not sshing as root (default python3)")
+    p.add_argument("--top", type=int, default=10, help="owners to list (default 10)")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    try:
+        hosts = expand_hosts(args.hosts, args.host_file)
+    except (OSError, subprocess.CalledProcessError) as e:
+        sys.stderr.write(f"Error: cannot read host list: {e}\n")
+        sys.exit(1)
+    if not hosts:
+        sys.stderr.write("Error: no hosts given.\n")
+        sys.exit(1)
+
+    remote_args = []
+    if args.dry_run:
+        remote_args.append("--dry-run")
+    if args.age_days is not None:
+        remote_args += ["--age-days", str(args.age_days)]
+    if args.shm_dir:
+        remote_args += ["--shm-dir", args.shm_dir]
+    report = sweep(hosts, args.ssh, remote_args, args.parallel, args.python, args.timeout)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_text(report, args.dry_run, args.top)
+    if report["failed"] == len(hosts):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
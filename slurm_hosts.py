@@ -0,0 +1,27 @@
+# Purpose: small Slurm helpers shared by the node tools (shm_sweep.py,
+#   ganglia_store.py), kept apart so they do not import each other.
+import shutil
+import subprocess
+from typing import List, Optional
+
+
+def run(cmd: List[str]) -> str:
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True)
+    return out.stdout.strip()
+
+
+def expand_hosts(hosts: List[str], host_file: Optional[str] = None) -> List[str]:
+    """Hosts from arguments and host_file; Slurm ranges (node[1-4]) are expanded with scontrol."""
+    if host_file:
+        with open(host_file) as f:
+            hosts = list(hosts) + [line.split("#")[0].strip() for line in f]
+    expanded: List[str] = []
+    for host in hosts:
+        if not host:
+            continue
+        if "[" in host and shutil.which("scontrol"):
+            expanded.extend(run(["scontrol", "show", "hostnames", host]).split())
+        else:
+            expanded.append(host)
+    # keep order, drop duplicates
+    return list(dict.fromkeys(expanded))
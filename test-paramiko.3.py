@@ -9,6 +9,22 @@ import signal
 import sys
 import socket
 
+from queue_wait import predict, print_predictions, walltime_minutes
+
+# (partition, walltime) options to choose from; the one predicted to start
+# soonest is used. Earlier entries win ties and are used when no prediction
+# is available.
+CANDIDATES = [
+    ("mit_normal", "03:00:00"),
+    ("mit_normal", "01:00:00"),
+    # add more as needed...
+]
+
+# How live node load (Ganglia) steers the job: "exclude" keeps it off
+# saturated nodes at no queue cost, "nodelist" pins it to the least-loaded
+# node, None submits without hints.
+NODE_HINTS = "exclude"
+
 def check_port_availability(port):
     """Check if a port is available on localhost."""
     try:
@@ -25,15 +41,16 @@ def check_port_availability(port):
         print(f"Error checking port {port}: {e}")
         return False
 
-def create_submission_script(username):
-    """Create the submission script with the correct username."""
+def create_submission_script(username, partition="mit_normal", walltime="03:00:00", hints=()):
+    """Create the submission script with the correct username, partition, walltime and node hints."""
+    hint_lines = "".join(f"#SBATCH {hint}\n" for hint in hints)
     return f"""#!/bin/bash
 #SBATCH --job-name={username}-jupyter
 #SBATCH --output=combined.txt
 #SBATCH --error=combined.txt
-#SBATCH --time=03:00:00
-#SBATCH --partition=mit_normal
-
+#SBATCH --time={walltime}
+#SBATCH --partition={partition}
+{hint_lines}
 # Print debug information
 echo "Running job on $(hostname)"
 echo "Current directory: $(pwd)"
@@ -91,13 +108,20 @@ while true; do
     sleep 2
 done
 
-# Keep the job running for 3 hours
-sleep 10800  # 3 hours = 3 * 60 * 60 seconds
+# Keep the job running for the requested walltime
+sleep {walltime_minutes(walltime) * 60}  # {walltime}
 
 # Clean up the Jupyter process when the job ends
 kill $JUPYTER_PID
 """
 
+def ssh_execute(ssh):
+    """Run a command on the login node; return (stdout, stderr) as text."""
+    def execute(cmd):
+        stdin, stdout, stderr = ssh.exec_command(cmd)
+        return stdout.read().decode(), stderr.read().decode()
+    return execute
+
 def get_compute_node(ssh, job_id):
     """Get the compute node where the job is running."""
     # Wait for the job to start and get its node
@@ -278,8 +302,33 @@ def main():
             # Define the remote path for the submission script using the actual home directory
             remote_script_path = f'{home_dir}/submission_script.sh'
 
+            # Pick the partition and walltime expected to start soonest
+            print("Predicting queue wait for candidate partitions...")
+            predictions = predict(ssh_execute(ssh), CANDIDATES)
+            print_predictions(predictions)
+            partition = predictions[0]['partition']
+            walltime = predictions[0]['walltime']
+            print(f"Submitting to {partition} with a {walltime} time limit")
+            if walltime != CANDIDATES[0][1]:
+                # a shorter candidate won on predicted wait; make sure the user notices
+                print(f"*** NOTE: this session ends after {walltime}, not the usual {CANDIDATES[0][1]}, "
+                      f"because it is predicted to start sooner. Remove the shorter entries from "
+                      f"CANDIDATES to always get {CANDIDATES[0][1]}. ***")
+
+            # Steer away from nodes that are already busy
+            hints = []
+            if NODE_HINTS:
+                try:
+                    # needs numpy (via ganglia_client); the launcher itself only needs paramiko
+                    from node_hints import ssh_node_hints
+                    hints = ssh_node_hints(ssh, partition, NODE_HINTS)
+                except ImportError as e:
+                    print(f"Warning: no node load hints ({e})")
+            if hints:
+                print(f"Node hints: {' '.join(hints)}")
+
             # Create the submission script with the correct username
-            submission_script = create_submission_script(username)
+            submission_script = create_submission_script(username, partition, walltime, hints)
 
             # Write the submission script to the remote server
             with sftp.open(remote_script_path, 'w') as remote_file:
@@ -337,7 +386,8 @@ def main():
                 
                 print("\nJupyterLab is now running!")
                 print("Press Ctrl+C to stop the SSH tunnel and exit.")
-                print("Note: The JupyterLab server will continue running on the cluster for 3 hours.")
+                print(f"Note: The JupyterLab server will continue running on the cluster for {walltime} "
+                      f"(the job's time limit).")
                 
                 # Keep the script running to maintain the tunnel
                 while True:
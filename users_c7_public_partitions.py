@@ -2,7 +2,7 @@
 import subprocess
 import sys
 import shutil
-from typing import List, Tuple, Set
+from typing import Iterator, List, Sequence, Tuple, Set
 
 # ---- CONFIG ----
 PARTITIONS = [
@@ -19,22 +19,47 @@ def run(cmd: List[str]) -> str:
     out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True)
     return out.stdout.strip()
 
-def sacct_user_partition(start: str, end: str) -> List[Tuple[str, str]]:
-    cmd = [
+def run_lines(cmd: List[str]) -> Iterator[str]:
+    """Like run(), but yields stdout line by line instead of buffering it all."""
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+        yield from proc.stdout
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+def sacct_cmd(start: str, end: str, fields: List[str], extra: Sequence[str] = ()) -> List[str]:
+    return [
         "sacct", "-a", "-n", "-p",
         "-S", start, "-E", end,
-        "-o", "User,Partition"
+        "-o", ",".join(fields),
+        *extra,
     ]
-    out = run(cmd)
+
+def iter_sacct_fields(start: str, end: str, fields: List[str],
+                      extra: Sequence[str] = ()) -> Iterator[Tuple[str, ...]]:
+    """Streaming sacct_fields(): constant memory however long the window."""
+    n = len(fields)
+    for line in run_lines(sacct_cmd(start, end, fields, extra)):
+        values = line.rstrip("\n").split("|")
+        if len(values) >= n and line.strip():
+            yield tuple(v.strip() for v in values[:n])
+
+def sacct_fields(start: str, end: str, fields: List[str],
+                 extra: Sequence[str] = ()) -> List[Tuple[str, ...]]:
+    out = run(sacct_cmd(start, end, fields, extra))
     rows = []
     for line in out.splitlines():
         if not line.strip():
             continue
-        fields = line.split("|")
-        if len(fields) >= 2:
-            user, part = fields[0].strip(), fields[1].strip()
-            if user and part:
-                rows.append((user, part))
+        values = line.split("|")
+        if len(values) >= len(fields):
+            rows.append(tuple(v.strip() for v in values[:len(fields)]))
+    return rows
+
+def sacct_user_partition(start: str, end: str) -> List[Tuple[str, str]]:
+    rows = []
+    for user, part in sacct_fields(start, end, ["User", "Partition"]):
+        if user and part:
+            rows.append((user, part))
     return rows
 
 def main():
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# Purpose: transcribe thousands of recordings with python-voice.py as a
+#   Slurm job array instead of on one workstation.
+#   `submit` splits a manifest (one audio path per line) into shards of
+#   --files-per-task files and submits one array task per shard. Each task
+#   runs python-voice.py on its shard and writes shards/NNNN.jsonl, renamed
+#   into place only when every file in the shard was transcribed, so a shard
+#   output that exists is a shard that is done. When some files failed, what
+#   was done is kept as shards/NNNN.partial.jsonl and the shard counts as
+#   failed. `status` shows progress, `retry` resubmits the failed shards
+#   (python-voice.py's result cache skips the files that already worked),
+#   and `merge` gathers the shard outputs, in manifest order, into one JSONL
+#   file, using partial outputs for shards that never finished. `submit
+#   --wait` does all of it: poll, retry up to --max-retries times, merge.
+#
+#   Everything lives in one work directory (state.json records the job ids),
+#   so any of the steps can be run again later. sbatch/squeue are run
+#   through --sbatch/--squeue so stand-ins can replace them.
+#
+# Usage: ./voice_array.py submit MANIFEST -d WORKDIR [--files-per-task N] [-p PARTITION] [-t WALLTIME] [--wait]
+#        ./voice_array.py status|retry|merge -d WORKDIR
+# Example: ./voice_array.py submit recordings.txt -d ~/voice-run --files-per-task 20 --wait
+import argparse
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+VOICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python-voice.py")
+FILES_PER_TASK = 25
+POLL_SECONDS = 60
+# python-voice.py's exit status when it finished but some files failed (EXIT_PARTIAL)
+VOICE_PARTIAL = 3
+
+
+def create_array_script(workdir: str, shards: int, partition: str = "mit_normal", walltime: str = "03:00:00",
+                        cpus: int = 4, max_running: Optional[int] = None, conda_env: str = "voice_env",
+                        voice_args: str = "") -> str:
+    """Create the array job script; task N transcribes shards/NNNN.list."""
+    throttle = f"%{max_running}" if max_running else ""
+    return f"""#!/bin/bash
+#SBATCH --job-name=voice-array
+#SBATCH --output={workdir}/logs/%A_%a.out
+#SBATCH --error={workdir}/logs/%A_%a.out
+#SBATCH --time={walltime}
+#SBATCH --partition={partition}
+#SBATCH --cpus-per-task={cpus}
+#SBATCH --array=0-{shards - 1}{throttle}
+
+# Print debug information
+echo "Running shard $SLURM_ARRAY_TASK_ID of job $SLURM_ARRAY_JOB_ID on $(hostname)"
+
+# Load miniforge module and the environment with pydub/SpeechRecognition
+module load miniforge
+eval "$(conda shell.bash hook)"
+conda activate {conda_env} || {{ echo "conda env {conda_env} not found"; exit 1; }}
+
+SHARD=$(printf %04d "$SLURM_ARRAY_TASK_ID")
+LIST={workdir}/shards/$SHARD.list
+OUT={workdir}/shards/$SHARD.jsonl
+PARTIAL={workdir}/shards/$SHARD.partial.jsonl
+
+python3 {VOICE} -f "$LIST" --jsonl "$OUT.tmp" -j "${{SLURM_CPUS_PER_TASK:-1}}" {voice_args}
+STATUS=$?
+
+# Done only when every file was transcribed
+if [ $STATUS -eq 0 ] && [ -f "$OUT.tmp" ]; then
+    mv "$OUT.tmp" "$OUT"
+    rm -f "$PARTIAL"
+    exit 0
+fi
+# {VOICE_PARTIAL}: some files failed; keep the rest for merge, leave the shard to retry
+if [ $STATUS -eq {VOICE_PARTIAL} ] && [ -f "$OUT.tmp" ]; then
+    mv "$OUT.tmp" "$PARTIAL"
+fi
+rm -f "$OUT.tmp"
+exit $STATUS
+"""
+
+
+def shard_name(workdir: str, shard: int, ext: str) -> str:
+    return os.path.join(workdir, "shards", f"{shard:04d}.{ext}")
+
+
+def load_state(workdir: str) -> dict:
+    try:
+        with open(os.path.join(workdir, "state.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        sys.stderr.write(f"Error: {workdir} has no state.json; run submit first.\n")
+        sys.exit(1)
+
+
+def save_state(workdir: str, state: dict) -> None:
+    path = os.path.join(workdir, "state.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def sbatch(cmd: str, script: str, array: Optional[str] = None) -> str:
+    """Submit script (optionally only some array indices); returns the job id."""
+    args = shlex.split(cmd) + ["--parsable"]
+    if array:
+        args.append(f"--array={array}")
+    out = subprocess.run(args + [script], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"sbatch failed: {out.stderr.strip()}")
+    # --parsable prints "jobid" or "jobid;cluster"
+    m = re.match(r"(\d+)", out.stdout.strip())
+    if not m:
+        raise RuntimeError(f"unexpected sbatch output: {out.stdout.strip()}")
+    return m.group(1)
+
+
+def queued_shards(cmd: str, job_ids: List[str]) -> Optional[Dict[int, str]]:
+    """Array index -> state for tasks of job_ids still in the queue; None if squeue failed.
+
+    squeue shows pending tasks folded as 123_[4-9%2]; -r unfolds them.
+    """
+    if not job_ids:
+        return {}
+    try:
+        out = subprocess.run(shlex.split(cmd) + ["-h", "-r", "-j", ",".join(job_ids), "-o", "%i %T"],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except OSError:
+        return None
+    # jobs that have left the queue make squeue fail ("Invalid job id"); that is not an error here,
+    # anything else (slurmctld down, timeouts) means the queue state is unknown
+    if out.returncode != 0 and "invalid job id" not in out.stderr.lower():
+        return None
+    queued = {}
+    for line in out.stdout.splitlines():
+        fields = line.split()
+        m = re.match(r"\d+_(\d+)$", fields[0]) if fields else None
+        if m and len(fields) > 1:
+            queued[int(m.group(1))] = fields[1]
+    return queued
+
+
+def progress(workdir: str, state: dict, squeue: str) -> dict:
+    """Shards by outcome: done, queued (pending/running), failed (left the queue unfinished).
+
+    When squeue fails, "unknown" is set and unfinished shards are not counted as failed.
+    """
+    queued = queued_shards(squeue, state["job_ids"])
+    unknown = queued is None
+    done, failed = [], []
+    for shard in range(state["shards"]):
+        if os.path.exists(shard_name(workdir, shard, "jsonl")):
+            done.append(shard)
+        elif not unknown and shard not in queued:
+            failed.append(shard)
+    return {"done": done, "queued": queued or {}, "failed": failed, "unknown": unknown}
+
+
+def print_progress(state: dict, p: dict) -> None:
+    if p["unknown"]:
+        print(f"{len(p['done'])}/{state['shards']} shards done; squeue failed, queue state unknown "
+              f"(jobs {', '.join(state['job_ids'])}, {state['files']} files)")
+        return
+    running = sum(1 for s in p["queued"].values() if s == "RUNNING")
+    print(f"{len(p['done'])}/{state['shards']} shards done, {running} running, "
+          f"{len(p['queued']) - running} pending, {len(p['failed'])} failed "
+          f"(jobs {', '.join(state['job_ids'])}, {state['files']} files)")
+
+
+def compress(indices: List[int]) -> str:
+    """[1, 2, 3, 7] -> '1-3,7' for sbatch --array."""
+    parts = []
+    for i in sorted(indices):
+        if parts and parts[-1][1] == i - 1:
+            parts[-1][1] = i
+        else:
+            parts.append([i, i])
+    return ",".join(f"{a}-{b}" if a != b else f"{a}" for a, b in parts)
+
+
+def retry(workdir: str, state: dict, failed: List[int], sbatch_cmd: str) -> None:
+    for shard in failed:
+        try:
+            os.remove(shard_name(workdir, shard, "jsonl.tmp"))
+        except OSError:
+            pass
+    job_id = sbatch(sbatch_cmd, os.path.join(workdir, "job.sh"), compress(failed))
+    state["job_ids"].append(job_id)
+    state["retries"] = state.get("retries", 0) + 1
+    save_state(workdir, state)
+    print(f"Resubmitted {len(failed)} shards as job {job_id}")
+
+
+def merge(workdir: str, state: dict, output: str) -> Tuple[int, int]:
+    """Concatenate shard outputs in order, partial ones for unfinished shards;
+    returns (shards merged from partial output, shards missing)."""
+    partial = missing = 0
+    with open(f"{output}.tmp", "w") as out:
+        for shard in range(state["shards"]):
+            for ext in ("jsonl", "partial.jsonl"):
+                try:
+                    with open(shard_name(workdir, shard, ext)) as f:
+                        for line in f:
+                            out.write(line)
+                except OSError:
+                    continue
+                partial += ext != "jsonl"
+                break
+            else:
+                missing += 1
+    os.replace(f"{output}.tmp", output)
+    return partial, missing
+
+
+def report_merge(output: str, partial: int, missing: int) -> None:
+    notes = [f"{partial} shards incomplete (partial output)"] if partial else []
+    notes += [f"{missing} shards missing"] if missing else []
+    print(f"Merged into {output}" + (f"; {', '.join(notes)}" if notes else ""))
+    if partial or missing:
+        sys.exit(1)
+
+
+def cmd_submit(args: argparse.Namespace) -> None:
+    with open(args.manifest) as f:
+        files = [line.strip() for line in f if line.strip()]
+    if not files:
+        sys.stderr.write(f"Error: {args.manifest} lists no files.\n")
+        sys.exit(1)
+    workdir = os.path.abspath(args.workdir)
+    if os.path.exists(os.path.join(workdir, "state.json")):
+        sys.stderr.write(f"Error: {workdir} already holds a run; use status/retry/merge or a new directory.\n")
+        sys.exit(1)
+    os.makedirs(os.path.join(workdir, "shards"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "logs"), exist_ok=True)
+
+    # relative manifest paths are relative to where submit was run, not the compute node's cwd
+    base = os.path.dirname(os.path.abspath(args.manifest))
+    files = [f if os.path.isabs(f) else os.path.normpath(os.path.join(base, f)) for f in files]
+    shards = (len(files) + args.files_per_task - 1) // args.files_per_task
+    for shard in range(shards):
+        with open(shard_name(workdir, shard, "list"), "w") as f:
+            f.writelines(p + "\n" for p in files[shard * args.files_per_task:(shard + 1) * args.files_per_task])
+
+    script = create_array_script(workdir, shards, args.partition, args.walltime, args.cpus,
+                                 args.max_running, args.conda_env, args.voice_args)
+    with open(os.path.join(workdir, "job.sh"), "w") as f:
+        f.write(script)
+    try:
+        job_id = sbatch(args.sbatch, os.path.join(workdir, "job.sh"))
+    except (RuntimeError, OSError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+    state = {"files": len(files), "shards": shards, "job_ids": [job_id], "retries": 0}
+    save_state(workdir, state)
+    print(f"Submitted {len(files)} files as {shards} array tasks: job {job_id}")
+    if args.wait:
+        wait(workdir, args)
+
+
+def wait(workdir: str, args: argparse.Namespace) -> None:
+    """Poll until every shard is done or out of retries, then merge."""
+    while True:
+        time.sleep(args.poll)
+        state = load_state(workdir)
+        p = progress(workdir, state, args.squeue)
+        print_progress(state, p)
+        if p["queued"] or p["unknown"]:
+            continue
+        if p["failed"] and state.get("retries", 0) < args.max_retries:
+            try:
+                retry(workdir, state, p["failed"], args.sbatch)
+            except (RuntimeError, OSError) as e:
+                sys.stderr.write(f"Error: {e}\n")
+                sys.exit(1)
+            continue
+        break
+    output = args.output or os.path.join(workdir, "transcripts.jsonl")
+    report_merge(output, *merge(workdir, state, output))
+
+
+def cmd_status(args: argparse.Namespace) -> None:
+    state = load_state(args.workdir)
+    p = progress(args.workdir, state, args.squeue)
+    print_progress(state, p)
+    if p["failed"]:
+        print("Failed shards: " + compress(p["failed"]))
+
+
+def cmd_retry(args: argparse.Namespace) -> None:
+    state = load_state(args.workdir)
+    p = progress(args.workdir, state, args.squeue)
+    if p["unknown"]:
+        sys.stderr.write("Error: squeue failed, so it is not known which shards are still queued; try again.\n")
+        sys.exit(1)
+    if not p["failed"]:
+        print("No failed shards.")
+        return
+    try:
+        retry(args.workdir, state, p["failed"], args.sbatch)
+    except (RuntimeError, OSError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+
+
+def cmd_merge(args: argparse.Namespace) -> None:
+    state = load_state(args.workdir)
+    output = args.output or os.path.join(args.workdir, "transcripts.jsonl")
+    report_merge(output, *merge(args.workdir, state, output))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-d", "--workdir", required=True, help="directory holding shards, logs and state")
+    common.add_argument("--sbatch", default="sbatch", help="sbatch command (default sbatch)")
+    common.add_argument("--squeue", default="squeue", help="squeue command (default squeue)")
+    common.add_argument("-o", "--output", help="merged JSONL (default WORKDIR/transcripts.jsonl)")
+
+    p = argparse.ArgumentParser(description="Transcribe a manifest of recordings as a Slurm job array.")
+    sub = p.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("submit", parents=[common], help="shard the manifest and submit the array")
+    s.add_argument("manifest", help="file with one audio path per line")
+    s.add_argument("-n", "--files-per-task", type=int, default=FILES_PER_TASK,
+                   help=f"files per array task (default {FILES_PER_TASK})")
+    s.add_argument("-p", "--partition", default="mit_normal", help="partition (default mit_normal)")
+    s.add_argument("-t", "--walltime", default="03:00:00", help="time limit per task (default 03:00:00)")
+    s.add_argument("-c", "--cpus", type=int, default=4, help="CPUs per task (default 4)")
+    s.add_argument("--max-running", type=int, help="at most this many tasks at once (sbatch --array=...%%N)")
+    s.add_argument("--conda-env", default="voice_env", help="conda env with pydub/SpeechRecognition")
+    s.add_argument("--voice-args", default="", help="extra python-voice.py options, e.g. '-b whisper -l en-US'")
+    s.add_argument("--wait", action="store_true", help="poll, retry failed shards and merge when done")
+    s.add_argument("--max-retries", type=int, default=2, help="resubmissions with --wait (default 2)")
+    s.add_argument("--poll", type=float, default=POLL_SECONDS, help=f"seconds between polls (default {POLL_SECONDS})")
+    s.set_defaults(func=cmd_submit)
+    sub.add_parser("status", parents=[common], help="show progress").set_defaults(func=cmd_status)
+    sub.add_parser("retry", parents=[common], help="resubmit failed shards").set_defaults(func=cmd_retry)
+    sub.add_parser("merge", parents=[common], help="gather shard outputs").set_defaults(func=cmd_merge)
+    args = p.parse_args(argv)
+    if getattr(args, "files_per_task", 1) < 1:
+        p.error("--files-per-task must be at least 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()